@@ -1,6 +1,6 @@
 """Authentication endpoints for OTP-based passwordless login."""
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response, status
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
@@ -274,15 +274,22 @@ async def get_current_user_info(
 
 
 @router.post('/auth/logout', status_code=status.HTTP_200_OK)
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
     """Logout current user by clearing session cookie.
     
     Args:
+        request: FastAPI request object
         response: FastAPI response object
         
     Returns:
         Success message
     """
+    # Drop the cookie token's cached verification. The JWT itself is not
+    # revoked; logging out only removes the cookie from this browser
+    session_token = request.cookies.get(SESSION_COOKIE_NAME)
+    if session_token:
+        auth_utils.invalidate_token(session_token)
+    
     # Clear session cookie
     response.delete_cookie(
         key=SESSION_COOKIE_NAME,
@@ -1,13 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 from pathlib import Path
-from dotenv import load_dotenv
+from utils.env import ensure_loaded
 from . import members, auth, invites, trees, relationships, memberships, users, avatars, notifications, gallery
 
 # Load .env in development so env vars are available when running locally
-load_dotenv()
+ensure_loaded()
 
 # CORS configuration
 ALLOWED_ORIGINS = os.environ.get("ALLOWED_ORIGINS", "").split(",")
@@ -23,6 +24,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (member lists, the OpenAPI schema) for clients that
+# send Accept-Encoding: gzip; small bodies aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
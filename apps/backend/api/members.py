@@ -17,6 +17,11 @@ import models
 import schemas
 from utils import db
 from utils.dependencies import get_current_user
+from utils.validation import (
+    translate_member_email_conflict,
+    validate_member_against_settings,
+    validate_unique_member_emails_bulk
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +31,7 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 AVATAR_SIZE = (400, 400)  # Standard avatar size
+MAX_BULK_MEMBERS = 100  # Per POST /trees/{id}/members/bulk request
 
 
 def sync_member_data_to_user(member: models.Member, db_session: Session):
@@ -236,41 +242,32 @@ def _check_tree_access(
     return membership
 
 
-def _validate_member_against_settings(
+def build_member(
+    tree_id: UUID,
     member_data: schemas.MemberCreate,
-    tree: models.Tree,
-    db_session: Session
-) -> None:
-    """Validate member data against tree settings.
+    updated_by: UUID
+) -> models.Member:
+    """Build (but don't add) a member of a tree from creation data.
     
     Args:
+        tree_id: Tree the member belongs to
         member_data: Member creation data
-        tree: Tree to validate against
-        db_session: Database session
+        updated_by: ID of the user creating the member
         
-    Raises:
-        HTTPException 400: If validation fails
+    Returns:
+        New Member instance
     """
-    # Parse tree settings
-    settings = schemas.TreeSettings(**tree.settings_json) if tree.settings_json else schemas.TreeSettings()
-    
-    # Validate gender if provided (optional validation)
-    if member_data.gender:
-        allowed_genders = ["male", "female", "other", "prefer not to say"]
-        if member_data.gender.lower() not in allowed_genders:
-            logger.warning(f"Non-standard gender value provided: {member_data.gender}")
-            # We allow it but log it for monitoring
-    
-    # Validate DOB format if provided
-    if member_data.dob:
-        try:
-            # Try to parse as ISO 8601 date
-            datetime.fromisoformat(member_data.dob.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Date of birth must be in ISO 8601 format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"
-            )
+    return models.Member(
+        tree_id=tree_id,
+        name=member_data.name,
+        email=member_data.email,
+        avatar_url=member_data.avatar_url,
+        dob=member_data.dob,
+        gender=member_data.gender,
+        deceased=member_data.deceased,
+        notes=member_data.notes,
+        updated_by=updated_by
+    )
 
 
 @router.get('/trees/{tree_id}/members', response_model=List[schemas.MemberRead])
@@ -432,7 +429,7 @@ async def create_member(
     ).first()
     
     # Validate member data against tree settings
-    _validate_member_against_settings(member_data, tree, db_session)
+    validate_member_against_settings(member_data, tree, db_session)
     
     # Check for duplicate email if email is provided
     if member_data.email:
@@ -440,20 +437,11 @@ async def create_member(
         validate_unique_member_email(db_session, member_data.email)
     
     # Create member
-    new_member = models.Member(
-        tree_id=tree_id,
-        name=member_data.name,
-        email=member_data.email,
-        avatar_url=member_data.avatar_url,
-        dob=member_data.dob,
-        gender=member_data.gender,
-        deceased=member_data.deceased,
-        notes=member_data.notes,
-        updated_by=current_user.id
-    )
+    new_member = build_member(tree_id, member_data, current_user.id)
     
     db_session.add(new_member)
-    db_session.commit()
+    with translate_member_email_conflict(db_session):
+        db_session.commit()
     db_session.refresh(new_member)
     
     logger.info(f"Created member {new_member.id} in tree {tree_id} by user {current_user.id}")
@@ -461,6 +449,78 @@ async def create_member(
     return new_member
 
 
+@router.post('/trees/{tree_id}/members/bulk', response_model=List[schemas.MemberRead], status_code=status.HTTP_201_CREATED)
+async def create_members_bulk(
+    tree_id: UUID,
+    members_data: List[schemas.MemberCreate],
+    current_user: models.User = Depends(get_current_user),
+    db_session: Session = Depends(db.get_db)
+):
+    """Create several members in a tree in one request and one transaction.
+    
+    Requires custodian role. Each member is validated the same way as in
+    create_member; if any of them fails, none are created.
+    
+    Args:
+        tree_id: Tree ID
+        members_data: Members to create (at most MAX_BULK_MEMBERS)
+        current_user: Authenticated user (must be custodian)
+        db_session: Database session
+        
+    Returns:
+        Created members, in request order
+        
+    Raises:
+        HTTPException 404: Tree not found
+        HTTPException 403: Access denied or insufficient permissions
+        HTTPException 400: Validation error or duplicate email
+    """
+    # Check custodian access first, so an empty or oversized body can't
+    # probe for trees the caller can't see
+    _check_tree_access(tree_id, current_user, db_session, required_role="custodian")
+    
+    if not members_data:
+        return []
+    if len(members_data) > MAX_BULK_MEMBERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_MEMBERS} members can be created per request"
+        )
+    
+    tree = db_session.query(models.Tree).filter(
+        models.Tree.id == tree_id
+    ).first()
+    
+    for member_data in members_data:
+        validate_member_against_settings(member_data, tree, db_session)
+    
+    # Emails must be unique within the batch and against existing members;
+    # check the latter with one query instead of one per member
+    validate_unique_member_emails_bulk(db_session, [m.email for m in members_data])
+    
+    new_members = [
+        build_member(tree_id, member_data, current_user.id)
+        for member_data in members_data
+    ]
+    
+    db_session.add_all(new_members)
+    with translate_member_email_conflict(db_session):
+        db_session.flush()
+    member_ids = [member.id for member in new_members]
+    db_session.commit()
+    
+    # Reload all rows with one SELECT rather than refreshing each member
+    loaded = {
+        member.id: member for member in db_session.query(models.Member).filter(
+            models.Member.id.in_(member_ids)
+        ).all()
+    }
+    
+    logger.info(f"Created {len(member_ids)} members in tree {tree_id} by user {current_user.id}")
+    
+    return [loaded[member_id] for member_id in member_ids]
+
+
 @router.patch('/members/{member_id}', response_model=schemas.MemberRead)
 async def update_member(
     member_id: UUID,
@@ -516,7 +576,8 @@ async def update_member(
     member.updated_by = current_user.id
     member.updated_at = datetime.utcnow()
     
-    db_session.commit()
+    with translate_member_email_conflict(db_session):
+        db_session.commit()
     db_session.refresh(member)
     
     # Sync member data back to user if unified identity
@@ -1,6 +1,6 @@
 """Membership management endpoints for role updates and member management."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from uuid import UUID
 import logging
@@ -8,9 +8,8 @@ import logging
 import models
 import schemas
 from utils import db
-from utils.dependencies import get_current_user
+from utils.dependencies import require_tree_role
 from utils.permissions import (
-    require_membership,
     validate_role_change,
     is_custodian,
     get_membership
@@ -30,7 +29,8 @@ def update_membership_role(
     user_id: UUID,
     tree_id: UUID,
     payload: schemas.MembershipUpdate,
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    current_user: models.User = Depends(require_tree_role("custodian")),
     db_session: Session = Depends(db.get_db)
 ):
     """Update a user's role in a tree (custodian-only).
@@ -49,7 +49,8 @@ def update_membership_role(
         user_id: UUID of the user whose role to update
         tree_id: UUID of the tree
         payload: New role information
-        current_user: Currently authenticated user
+        request: Current request; memoizes membership lookups
+        current_user: Authenticated custodian of the tree
         db_session: Database session
         
     Returns:
@@ -66,16 +67,15 @@ def update_membership_role(
             "role": "custodian"
         }
     """
-    # Check that current user is a custodian of the tree
-    require_membership(current_user.id, tree_id, db_session, "custodian")
-    
+    # require_tree_role loaded the caller and their membership in one
+    # query and checked they are a custodian of the tree
     logger.info(
         f"Custodian {current_user.email} attempting to update role "
         f"for user {user_id} in tree {tree_id}"
     )
     
-    # Get the membership to update
-    membership = get_membership(user_id, tree_id, db_session)
+    # Get the membership to update (no query when it's the caller's own)
+    membership = get_membership(user_id, tree_id, db_session, request)
     
     if not membership:
         raise HTTPException(
@@ -114,7 +114,7 @@ def update_membership_role(
 )
 def list_tree_memberships(
     tree_id: UUID,
-    current_user: models.User = Depends(get_current_user),
+    current_user: models.User = Depends(require_tree_role("viewer")),
     db_session: Session = Depends(db.get_db)
 ):
     """List all memberships for a tree.
@@ -126,7 +126,7 @@ def list_tree_memberships(
     
     Args:
         tree_id: UUID of the tree
-        current_user: Currently authenticated user
+        current_user: Authenticated member of the tree (any role)
         db_session: Database session
         
     Returns:
@@ -139,9 +139,7 @@ def list_tree_memberships(
     Example:
         GET /api/trees/987f6543-e21c-34d5-b678-123456789abc/memberships
     """
-    # Check that user has access to the tree (any role)
-    require_membership(current_user.id, tree_id, db_session)
-    
+    # Access (any role) was checked by require_tree_role
     # Get all memberships with user information
     memberships = db_session.query(
         models.Membership, models.User
@@ -177,7 +175,8 @@ def list_tree_memberships(
 def remove_membership(
     user_id: UUID,
     tree_id: UUID,
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    current_user: models.User = Depends(require_tree_role("custodian")),
     db_session: Session = Depends(db.get_db)
 ):
     """Remove a user's membership from a tree (custodian-only).
@@ -194,7 +193,8 @@ def remove_membership(
     Args:
         user_id: UUID of the user to remove
         tree_id: UUID of the tree
-        current_user: Currently authenticated user
+        request: Current request; memoizes membership lookups
+        current_user: Authenticated custodian of the tree
         db_session: Database session
         
     Returns:
@@ -208,16 +208,14 @@ def remove_membership(
     Example:
         DELETE /api/memberships/123e4567-e89b-12d3-a456-426614174000/987f6543-e21c-34d5-b678-123456789abc
     """
-    # Check that current user is a custodian
-    require_membership(current_user.id, tree_id, db_session, "custodian")
-    
+    # require_tree_role checked that the caller is a custodian
     logger.info(
         f"Custodian {current_user.email} attempting to remove "
         f"user {user_id} from tree {tree_id}"
     )
     
-    # Get the membership to remove
-    membership = get_membership(user_id, tree_id, db_session)
+    # Get the membership to remove (no query when it's the caller's own)
+    membership = get_membership(user_id, tree_id, db_session, request)
     
     if not membership:
         raise HTTPException(
@@ -188,7 +188,7 @@ def _relationship_exists(
     db_session: Session
 ) -> bool:
     """Check if a relationship already exists between two members."""
-    exists = db_session.query(models.Relationship).filter(
+    exists = db_session.query(models.Relationship.id).filter(
         and_(
             models.Relationship.type == rel_type,
             or_(
@@ -485,7 +485,7 @@ async def add_child(
         )
     
     # Check if child is already a parent (circular relationship prevention)
-    is_parent_of_self = db_session.query(models.Relationship).filter(
+    is_parent_of_self = db_session.query(models.Relationship.id).filter(
         and_(
             models.Relationship.type == "parent-child",
             models.Relationship.a_member_id == child_id,
@@ -669,14 +669,17 @@ async def remove_child(
 def _build_relationship_graph(tree_id: UUID, db_session: Session) -> dict:
     """Build an adjacency graph of all relationships in a tree.
     
+    Only the columns the computation reads are loaded, as plain rows
+    rather than ORM entities.
+    
     Returns a dict with:
-        - members: Dict[UUID, Member] - All members by ID
+        - members: Dict[UUID, Row] - All members (id, name) by ID
         - spouses: Dict[UUID, List[UUID]] - Spouse relationships
         - parents: Dict[UUID, List[UUID]] - Child -> Parents mapping
         - children: Dict[UUID, List[UUID]] - Parent -> Children mapping
     """
     # Get all members
-    members_list = db_session.query(models.Member).filter(
+    members_list = db_session.query(models.Member.id, models.Member.name).filter(
         models.Member.tree_id == tree_id
     ).all()
     
@@ -686,19 +689,23 @@ def _build_relationship_graph(tree_id: UUID, db_session: Session) -> dict:
     children = {m.id: [] for m in members_list}
     
     # Get all relationships
-    relationships = db_session.query(models.Relationship).filter(
+    relationships = db_session.query(
+        models.Relationship.type,
+        models.Relationship.a_member_id,
+        models.Relationship.b_member_id
+    ).filter(
         models.Relationship.tree_id == tree_id
     ).all()
     
-    for rel in relationships:
-        if rel.type == "spouse":
+    for rel_type, a_member_id, b_member_id in relationships:
+        if rel_type == "spouse":
             # Bidirectional spouse relationship
-            spouses[rel.a_member_id].append(rel.b_member_id)
-            spouses[rel.b_member_id].append(rel.a_member_id)
-        elif rel.type == "parent-child":
+            spouses[a_member_id].append(b_member_id)
+            spouses[b_member_id].append(a_member_id)
+        elif rel_type == "parent-child":
             # a is parent, b is child
-            children[rel.a_member_id].append(rel.b_member_id)
-            parents[rel.b_member_id].append(rel.a_member_id)
+            children[a_member_id].append(b_member_id)
+            parents[b_member_id].append(a_member_id)
     
     return {
         "members": members,
@@ -11,7 +11,13 @@ import models
 import schemas
 from utils import db
 from utils.dependencies import get_current_user
-from utils.tree_validation import validate_settings_change, get_settings_change_impact
+from utils.tree_validation import analyze_settings_change
+from utils.validation import (
+    translate_member_email_conflict,
+    validate_member_against_settings,
+    validate_unique_member_email
+)
+from .members import build_member
 
 logger = logging.getLogger(__name__)
 
@@ -153,7 +159,7 @@ async def list_trees(
     return result
 
 
-@router.post('/trees', response_model=schemas.TreeRead, status_code=status.HTTP_201_CREATED)
+@router.post('/trees', response_model=schemas.TreeCreated, status_code=status.HTTP_201_CREATED)
 async def create_tree(
     tree_data: schemas.TreeCreate,
     current_user: models.User = Depends(get_current_user),
@@ -161,9 +167,13 @@ async def create_tree(
 ):
     """Create a new family tree and assign creator as custodian.
     
+    If tree_data.initial_member is given, that member is created in the
+    same transaction, saving a separate POST /trees/{id}/members call.
+    
     Validates:
     - User is at least 12 years old (custodian requirement)
     - Tree settings schema is valid
+    - Initial member (if any) passes the usual member validation
     
     Args:
         tree_data: Tree creation data
@@ -174,7 +184,7 @@ async def create_tree(
         Created tree data
         
     Raises:
-        HTTPException 400: Invalid age or settings
+        HTTPException 400: Invalid age, settings or initial member
     """
     # Validate custodian age
     _validate_custodian_age(current_user, db_session)
@@ -232,18 +242,34 @@ async def create_tree(
     )
     db_session.add(custodian_member)
     
+    # Optional extra member requested by the caller; validated against the
+    # new tree's settings, and nothing is committed if it fails
+    initial_member_id = None
+    if tree_data.initial_member:
+        member_data = tree_data.initial_member
+        db_session.flush()
+        validate_member_against_settings(member_data, new_tree, db_session)
+        if member_data.email:
+            validate_unique_member_email(db_session, member_data.email)
+        initial_member = build_member(new_tree.id, member_data, current_user.id)
+        db_session.add(initial_member)
+        with translate_member_email_conflict(db_session):
+            db_session.flush()
+        initial_member_id = initial_member.id
+    
     db_session.commit()
     
     logger.info(f"Tree created: {new_tree.id} by user {current_user.id}, custodian member: {custodian_member.id}")
     
     # Return tree data
-    return schemas.TreeRead(
+    return schemas.TreeCreated(
         id=new_tree.id,
         name=new_tree.name,
         description=new_tree.description,
         settings=settings,
         created_by=new_tree.created_by,
-        created_at=new_tree.created_at
+        created_at=new_tree.created_at,
+        initial_member_id=initial_member_id
     )
 
 
@@ -402,23 +428,17 @@ async def update_tree(
         current_settings = schemas.TreeSettings(**tree.settings_json) if tree.settings_json else schemas.TreeSettings()
         new_settings = tree_update.settings
         
-        # Validate settings change against existing relationships
-        is_valid, errors = validate_settings_change(
+        # Validate settings change against existing relationships; the
+        # impact report is only built for a rejected change
+        is_valid, errors, impact = analyze_settings_change(
             db_session,
             tree_id,
             current_settings,
-            new_settings
+            new_settings,
+            impact_if_valid=False
         )
         
         if not is_valid:
-            # Get detailed impact analysis
-            impact = get_settings_change_impact(
-                db_session,
-                tree_id,
-                current_settings,
-                new_settings
-            )
-            
             logger.warning(
                 f"Settings update rejected for tree {tree_id}: {errors}",
                 extra={"impact": impact}
@@ -492,16 +512,8 @@ async def preview_settings_change(
     # Get current settings
     current_settings = schemas.TreeSettings(**tree.settings_json) if tree.settings_json else schemas.TreeSettings()
     
-    # Get impact analysis
-    impact = get_settings_change_impact(
-        db_session,
-        tree_id,
-        current_settings,
-        new_settings
-    )
-    
-    # Add validation result
-    is_valid, errors = validate_settings_change(
+    # Validation and impact analysis share one context
+    is_valid, errors, impact = analyze_settings_change(
         db_session,
         tree_id,
         current_settings,
@@ -553,31 +565,32 @@ async def delete_tree(
     _check_tree_access(tree_id, current_user, db_session, required_role='custodian')
     
     if permanent:
-        # Hard delete: Remove all related data
+        # Hard delete: Remove all related data. The session is committed
+        # right after, so skip matching the deletes against loaded objects
         # Delete relationships
         db_session.query(models.Relationship).filter(
             models.Relationship.tree_id == tree_id
-        ).delete()
+        ).delete(synchronize_session=False)
         
         # Delete members
         db_session.query(models.Member).filter(
             models.Member.tree_id == tree_id
-        ).delete()
+        ).delete(synchronize_session=False)
         
         # Delete memberships
         db_session.query(models.Membership).filter(
             models.Membership.tree_id == tree_id
-        ).delete()
+        ).delete(synchronize_session=False)
         
         # Delete invites
         db_session.query(models.Invite).filter(
             models.Invite.tree_id == tree_id
-        ).delete()
+        ).delete(synchronize_session=False)
         
         # Delete tree
         db_session.query(models.Tree).filter(
             models.Tree.id == tree_id
-        ).delete()
+        ).delete(synchronize_session=False)
         
         db_session.commit()
         
@@ -18,8 +18,8 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-from dotenv import load_dotenv
-load_dotenv()
+from utils.env import ensure_loaded
+ensure_loaded()
 
 import os
 from models import Base
@@ -68,13 +68,41 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def do_run_migrations(connection) -> None:
+    """Run migrations on an open connection.
+
+    Each migration gets its own transaction, so one that steps out into an
+    autocommit block (e.g. CREATE INDEX CONCURRENTLY) leaves the others
+    transactional.
+    """
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    A caller running alembic in-process (tools/reset_alembic.py) can pass
+    its own connection in ``config.attributes['connection']``; it is used
+    as-is instead of building a second engine. It must not already be in
+    a transaction, or alembic treats that transaction as external and
+    cannot leave it for an autocommit block.
+
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -82,12 +110,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        do_run_migrations(connection)
 
 
 if context.is_offline_mode():
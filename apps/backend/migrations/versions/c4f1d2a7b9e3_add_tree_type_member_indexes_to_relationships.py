@@ -0,0 +1,27 @@
+"""add_tree_type_member_indexes_to_relationships
+
+Revision ID: c4f1d2a7b9e3
+Revises: abab0ecbe152
+Create Date: 2026-10-16 10:12:41.308215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1d2a7b9e3'
+down_revision = 'abab0ecbe152'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Cover the (tree, type, member) lookups for both ends of a relationship
+    op.create_index('ix_relationships_tree_type_a', 'relationships', ['tree_id', 'type', 'a_member_id'], unique=False)
+    op.create_index('ix_relationships_tree_type_b', 'relationships', ['tree_id', 'type', 'b_member_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_relationships_tree_type_b', table_name='relationships')
+    op.drop_index('ix_relationships_tree_type_a', table_name='relationships')
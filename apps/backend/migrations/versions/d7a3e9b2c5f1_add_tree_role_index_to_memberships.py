@@ -0,0 +1,35 @@
+"""add_tree_role_index_to_memberships
+
+Revision ID: d7a3e9b2c5f1
+Revises: c4f1d2a7b9e3
+Create Date: 2026-10-16 14:03:17.522904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3e9b2c5f1'
+down_revision = 'c4f1d2a7b9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lets the last-custodian check stop after two index entries. Built
+    # CONCURRENTLY so memberships stay writable; that can't run inside a
+    # transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_memberships_tree_role', 'memberships', ['tree_id', 'role'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_memberships_tree_role', table_name='memberships',
+            postgresql_concurrently=True
+        )
@@ -1,12 +1,13 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, func, Text, JSON, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, func, Text, JSON, Index, Uuid, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
+from enum import IntEnum
 import uuid
 from utils.db import Base
 
 class User(Base):
     __tablename__ = 'users'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, unique=True, index=True, nullable=False)
     display_name = Column(String)
     avatar_url = Column(String, nullable=True)  # URL to user's avatar image
@@ -29,33 +30,56 @@ class User(Base):
 
 class Tree(Base):
     __tablename__ = 'trees'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     description = Column(Text)
     settings_json = Column(JSON)
-    created_by = Column(UUID(as_uuid=True), ForeignKey('users.id'))
+    created_by = Column(Uuid(as_uuid=True), ForeignKey('users.id'))
     created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
     notification_settings = relationship("NotificationSettings", back_populates="tree", cascade="all, delete-orphan")
     gallery_photos = relationship("GalleryPhoto", back_populates="tree", cascade="all, delete-orphan")
 
+class RoleLevel(IntEnum):
+    """Membership roles, ordered so a higher role compares greater."""
+    viewer = 1
+    contributor = 2
+    custodian = 3
+
+# Role name -> level, built once for Membership.role_level
+ROLE_LEVELS = {level.name: level for level in RoleLevel}
+
 class Membership(Base):
     __tablename__ = 'memberships'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id'), nullable=False, index=True)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id'), nullable=False, index=True)
     role = Column(String, nullable=False)
     joined_at = Column(DateTime, server_default=func.now())
     
     __table_args__ = (
         Index('ix_memberships_user_tree', 'user_id', 'tree_id', unique=True),
+        Index('ix_memberships_tree_role', 'tree_id', 'role'),
     )
+    
+    @hybrid_property
+    def role_level(self) -> int:
+        """The role as a RoleLevel (0 for an unknown role).
+        
+        Usable in queries as well, e.g. ``Membership.role_level >= RoleLevel.contributor``.
+        """
+        return ROLE_LEVELS.get(self.role, 0)
+    
+    @role_level.inplace.expression
+    @classmethod
+    def _role_level_expression(cls):
+        return case(ROLE_LEVELS, value=cls.role, else_=0)
 
 class Member(Base):
     __tablename__ = 'members'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
     name = Column(String, index=True, nullable=False)
     email = Column(String, unique=False, nullable=True, index=True)  # Unique constraint handled by partial index
     avatar_url = Column(String, nullable=True)  # URL to member's avatar image
@@ -77,30 +101,32 @@ class Member(Base):
     # Metadata
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
-    updated_by = Column(UUID(as_uuid=True), ForeignKey('users.id'))
+    updated_by = Column(Uuid(as_uuid=True), ForeignKey('users.id'))
     
     # Relationships
     gallery_photos = relationship("GalleryPhoto", back_populates="member", cascade="all, delete-orphan")
 
 class Relationship(Base):
     __tablename__ = 'relationships'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
     type = Column(String, nullable=False, index=True) # e.g., 'spouse', 'parent-child'
-    a_member_id = Column(UUID(as_uuid=True), ForeignKey('members.id'), index=True, nullable=False)
-    b_member_id = Column(UUID(as_uuid=True), ForeignKey('members.id'), index=True, nullable=False)
+    a_member_id = Column(Uuid(as_uuid=True), ForeignKey('members.id'), index=True, nullable=False)
+    b_member_id = Column(Uuid(as_uuid=True), ForeignKey('members.id'), index=True, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     
     __table_args__ = (
         Index('ix_relationships_tree_type', 'tree_id', 'type'),
         Index('ix_relationships_members', 'a_member_id', 'b_member_id'),
+        Index('ix_relationships_tree_type_a', 'tree_id', 'type', 'a_member_id'),
+        Index('ix_relationships_tree_type_b', 'tree_id', 'type', 'b_member_id'),
     )
 
 class Invite(Base):
     __tablename__ = 'invites'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
-    member_id = Column(UUID(as_uuid=True), ForeignKey('members.id'), index=True, nullable=True)  # Member this invite is for
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
+    member_id = Column(Uuid(as_uuid=True), ForeignKey('members.id'), index=True, nullable=True)  # Member this invite is for
     email = Column(String, index=True, nullable=False)
     role = Column(String, nullable=False)
     token = Column(String, nullable=False, unique=True)
@@ -108,11 +134,11 @@ class Invite(Base):
     accepted_at = Column(DateTime, nullable=True)
     resend_count = Column(Integer, default=0, nullable=False)  # Track number of resends
     created_at = Column(DateTime, server_default=func.now())
-    created_by = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=True)  # Who sent the invite
+    created_by = Column(Uuid(as_uuid=True), ForeignKey('users.id'), nullable=True)  # Who sent the invite
 
 class OTPCode(Base):
     __tablename__ = 'otp_codes'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, index=True, nullable=False)
     code = Column(String, nullable=False)
     expires_at = Column(DateTime, nullable=False)
@@ -121,8 +147,8 @@ class OTPCode(Base):
 
 class Event(Base):
     __tablename__ = 'events'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
     
     # Event Details
     title = Column(String, nullable=False)
@@ -139,7 +165,7 @@ class Event(Base):
     
     # Privacy & Metadata
     is_public = Column(Boolean, default=True)  # Visible to all tree members
-    created_by = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    created_by = Column(Uuid(as_uuid=True), ForeignKey('users.id'), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
@@ -150,8 +176,8 @@ class Event(Base):
 
 class Photo(Base):
     __tablename__ = 'photos'
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id'), index=True, nullable=False)
     
     # Photo Details
     title = Column(String, nullable=True)
@@ -165,12 +191,12 @@ class Photo(Base):
     
     # Associations
     member_ids = Column(JSON, nullable=True)  # Array of member UUIDs tagged in this photo
-    event_id = Column(UUID(as_uuid=True), ForeignKey('events.id'), nullable=True, index=True)  # Associated event
+    event_id = Column(Uuid(as_uuid=True), ForeignKey('events.id'), nullable=True, index=True)  # Associated event
     is_family_photo = Column(Boolean, default=False)  # Family photo vs individual
     
     # Privacy & Metadata
     is_public = Column(Boolean, default=True)
-    uploaded_by = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    uploaded_by = Column(Uuid(as_uuid=True), ForeignKey('users.id'), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
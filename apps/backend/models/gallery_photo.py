@@ -3,8 +3,7 @@ Gallery Photo Model
 Manages photo uploads and gallery functionality
 """
 
-from sqlalchemy import Column, String, Text, Boolean, Integer, ForeignKey, TIMESTAMP
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Boolean, Integer, ForeignKey, TIMESTAMP, Uuid
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -16,10 +15,10 @@ class GalleryPhoto(Base):
     """Photos uploaded to family tree galleries"""
     __tablename__ = 'gallery_photos'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id', ondelete='CASCADE'), nullable=False)
-    member_id = Column(UUID(as_uuid=True), ForeignKey('members.id', ondelete='CASCADE'), nullable=True)  # Nullable for general tree photos
-    uploaded_by = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id', ondelete='CASCADE'), nullable=False)
+    member_id = Column(Uuid(as_uuid=True), ForeignKey('members.id', ondelete='CASCADE'), nullable=True)  # Nullable for general tree photos
+    uploaded_by = Column(Uuid(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     
     # File information
     file_path = Column(Text, nullable=False)
@@ -34,7 +33,7 @@ class GalleryPhoto(Base):
     
     # Approval workflow
     approved = Column(Boolean, nullable=False, default=False)
-    approved_by = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    approved_by = Column(Uuid(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     approved_at = Column(TIMESTAMP, nullable=True)
     
     # Timestamps
@@ -3,8 +3,7 @@ Notification Settings Model
 Manages user notification preferences per tree
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, TIMESTAMP, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, TIMESTAMP, UniqueConstraint, Uuid
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -16,9 +15,9 @@ class NotificationSettings(Base):
     """User notification preferences for specific trees"""
     __tablename__ = 'notification_settings'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    tree_id = Column(UUID(as_uuid=True), ForeignKey('trees.id', ondelete='CASCADE'), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    tree_id = Column(Uuid(as_uuid=True), ForeignKey('trees.id', ondelete='CASCADE'), nullable=False)
     
     # Event notification settings
     events_enabled = Column(Boolean, nullable=False, default=True)
@@ -61,8 +60,8 @@ class GlobalNotificationPreferences(Base):
     """Global notification preferences for users"""
     __tablename__ = 'global_notification_preferences'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True)
     
     # Global notification settings
     email_notifications_enabled = Column(Boolean, nullable=False, default=True)
@@ -74,7 +74,8 @@ class TreeBase(BaseModel):
     settings: Optional[TreeSettings] = None
 
 class TreeCreate(TreeBase):
-    pass
+    # Optional member created together with the tree, in the same transaction
+    initial_member: Optional['MemberCreate'] = None
 
 class TreeUpdate(BaseModel):
     name: Optional[str] = None
@@ -95,6 +96,11 @@ class TreeRead(TreeBase):
 
 
 # Extended Tree Schemas for API responses
+class TreeCreated(TreeRead):
+    """Tree creation response; includes the initial member's ID if one was requested."""
+    initial_member_id: Optional[UUID] = None
+
+
 class TreeWithMembership(TreeRead):
     """Tree with user's membership information."""
     role: str  # User's role in this tree
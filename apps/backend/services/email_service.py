@@ -8,6 +8,8 @@ import logging
 from datetime import datetime
 from typing import Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .templates import render_invite_email
 from .email_styles import get_environment_url
 
@@ -20,6 +22,20 @@ FROM_NAME = os.getenv("FROM_NAME", "Phylo")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 FRONTEND_URL = get_environment_url(ENVIRONMENT)
 
+# One pooled session for every Mailtrap call, so invites sent close together
+# reuse the same TLS connection. Only connection failures are retried: the
+# request never reached Mailtrap, so a retry can't send a duplicate email.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(connect=3, read=0, backoff_factor=0.5)
+))
+_session.headers.update({
+    "Authorization": f"Bearer {MAILTRAP_API_KEY}",
+    "Content-Type": "application/json"
+})
+
 
 def _format_date(dt: datetime) -> str:
     """Format datetime for display in emails."""
@@ -277,12 +293,6 @@ def send_invite_email(
         # Use "Family Tree" in subject but "Phylo" in content
         subject = f"{'[Resent] ' if is_resend else ''}Family Tree Invitation - {tree_name}"
         
-        # Prepare request
-        headers = {
-            "Authorization": f"Bearer {MAILTRAP_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "from": {
                 "email": FROM_EMAIL,
@@ -296,10 +306,9 @@ def send_invite_email(
         }
         
         # Send request
-        response = requests.post(
+        response = _session.post(
             MAILTRAP_API_URL,
             json=payload,
-            headers=headers,
             timeout=10
         )
         
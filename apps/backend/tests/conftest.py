@@ -0,0 +1,100 @@
+"""Shared pytest fixtures for the backend test suite."""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _no_real_email():
+    """Stub out outgoing email for the whole run.
+
+    Patches the Mailtrap transport inside the email services rather than
+    the send functions themselves, so the names the API modules imported
+    are covered too and no test can reach Mailtrap by accident.
+    """
+    with patch("services.email._send_via_mailtrap", return_value=(True, {})), \
+            patch("services.email_service._session") as mock_session:
+        mock_session.post.return_value.status_code = 200
+        yield
+
+
+@pytest.fixture
+def mailbox(monkeypatch):
+    """Record the keyword arguments of every OTP email sent during a test."""
+    sent = []
+
+    def _record(**kwargs):
+        sent.append(kwargs)
+        return True, {}
+
+    monkeypatch.setattr("api.auth.send_email", _record)
+    return sent
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The FastAPI app, imported on first use rather than at collection."""
+    from api.main import app
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """Single TestClient shared by every test in the session."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="module")
+def db_connection():
+    """One connection to the shared test database per module.
+
+    Missing tables are created first (in-memory SQLite starts with none)
+    and Postgres starts from empty tables. Everything runs inside an
+    outer transaction that is rolled back after the module, so
+    module-scoped fixtures can seed rows for every test in it.
+    """
+    from models import Base
+    from utils.test_db import test_engine
+
+    connection = test_engine.connect()
+    Base.metadata.create_all(connection)
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("TRUNCATE invites, memberships, trees, users RESTART IDENTITY CASCADE"))
+    connection.commit()
+    transaction = connection.begin()
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def db_session(app, db_connection):
+    """Session inside a SAVEPOINT rolled back after each test, shared with the API.
+
+    session.commit() only releases a SAVEPOINT, so nothing a test writes
+    outlives the test. Objects keep their loaded state across commits;
+    IDs are client-side and server defaults are never asserted on.
+    """
+    from utils.db import get_db
+    from utils.test_db import TestSessionLocal
+
+    savepoint = db_connection.begin_nested()
+    session = TestSessionLocal(
+        bind=db_connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False
+    )
+    app.dependency_overrides[get_db] = lambda: session
+    try:
+        yield session
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        session.close()
+        savepoint.rollback()
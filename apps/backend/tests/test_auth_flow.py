@@ -11,7 +11,7 @@ Run with: python -m pytest test_auth_flow.py -v
 or: python test_auth_flow.py
 """
 
-import requests
+import httpx
 import time
 from typing import Optional
 
@@ -25,13 +25,18 @@ class AuthClient:
     
     def __init__(self, base_url: str):
         self.base_url = base_url
-        self.session = requests.Session()
+        # Sync client: pooled keep-alive connections and relative request paths
+        self.session = httpx.Client(
+            base_url=base_url,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
         self.access_token: Optional[str] = None
     
     def request_otp(self, email: str) -> dict:
         """Request OTP code for email."""
         response = self.session.post(
-            f"{self.base_url}/api/auth/otp/request",
+            "/api/auth/otp/request",
             json={"email": email}
         )
         response.raise_for_status()
@@ -40,7 +45,7 @@ class AuthClient:
     def verify_otp(self, email: str, code: str) -> dict:
         """Verify OTP code and get session token."""
         response = self.session.post(
-            f"{self.base_url}/api/auth/otp/verify",
+            "/api/auth/otp/verify",
             json={"email": email, "code": code}
         )
         response.raise_for_status()
@@ -55,7 +60,7 @@ class AuthClient:
             headers["Authorization"] = f"Bearer {self.access_token}"
         
         response = self.session.get(
-            f"{self.base_url}/api/auth/me",
+            "/api/auth/me",
             headers=headers
         )
         response.raise_for_status()
@@ -68,7 +73,7 @@ class AuthClient:
             headers["Authorization"] = f"Bearer {self.access_token}"
         
         response = self.session.post(
-            f"{self.base_url}/api/auth/refresh",
+            "/api/auth/refresh",
             headers=headers
         )
         response.raise_for_status()
@@ -78,7 +83,7 @@ class AuthClient:
     
     def logout(self) -> dict:
         """Logout and clear session."""
-        response = self.session.post(f"{self.base_url}/api/auth/logout")
+        response = self.session.post("/api/auth/logout")
         response.raise_for_status()
         self.access_token = None
         return response.json()
@@ -98,7 +103,7 @@ def test_auth_flow():
         result = client.request_otp(TEST_EMAIL)
         print(f"   ✓ OTP requested successfully")
         print(f"   Remaining requests: {result.get('remaining_requests')}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"   ✗ Failed to request OTP: {e}")
         return False
     
@@ -118,7 +123,7 @@ def test_auth_flow():
         print(f"   User ID: {result['user']['id']}")
         print(f"   Email: {result['user']['email']}")
         print(f"   Token type: {result['token_type']}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"   ✗ Failed to verify OTP: {e}")
         return False
     
@@ -129,7 +134,7 @@ def test_auth_flow():
         print(f"   ✓ Retrieved user info")
         print(f"   Display name: {user.get('display_name')}")
         print(f"   Created at: {user.get('created_at')}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"   ✗ Failed to get user info: {e}")
         return False
     
@@ -139,7 +144,7 @@ def test_auth_flow():
         result = client.refresh_token()
         print(f"   ✓ Token refreshed successfully")
         print(f"   New token expires in: {result.get('expires_in')} seconds")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"   ✗ Failed to refresh token: {e}")
         return False
     
@@ -149,7 +154,7 @@ def test_auth_flow():
         result = client.logout()
         print(f"   ✓ Logged out successfully")
         print(f"   Message: {result.get('message')}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"   ✗ Failed to logout: {e}")
         return False
     
@@ -159,7 +164,7 @@ def test_auth_flow():
         client.get_current_user()
         print(f"   ✗ Still authenticated (unexpected)")
         return False
-    except requests.exceptions.RequestException:
+    except httpx.HTTPError:
         print(f"   ✓ Not authenticated (expected)")
     
     print("\n" + "=" * 60)
@@ -185,7 +190,7 @@ def test_rate_limiting():
             remaining = result.get('remaining_requests', 'N/A')
             print(f"   Request {i+1}: ✓ Success (remaining: {remaining})")
             time.sleep(0.5)  # Small delay between requests
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 print(f"   Request {i+1}: ✓ Rate limited (expected)")
                 break
@@ -8,30 +8,58 @@ Tests cover:
 - Invalid token handling
 """
 
+import asyncio
 import pytest
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
+from zoneinfo import ZoneInfo
 import jwt
-import pytz
+from fastapi import HTTPException
 
 from utils.auth import (
     create_access_token,
     verify_access_token,
+    invalidate_token,
     decode_token_payload,
     SECRET_KEY,
     ALGORITHM
 )
+from utils.dependencies import _authenticated_user_id, get_current_user_optional
+
+NAIROBI_TZ = ZoneInfo('Africa/Nairobi')
+
+# Tokens shared by the tampering tests, signed once at import
+_FIXED_UUID = uuid4()
+_SAMPLE_TOKEN = create_access_token(_FIXED_UUID, "test@example.com")
+_HEADER, _PAYLOAD, _SIGNATURE = _SAMPLE_TOKEN.split('.')
+# Change the first signature character (a trailing one may only flip padding bits)
+_TAMPERED = f"{_HEADER}.{_PAYLOAD}.{'A' if _SIGNATURE[0] != 'A' else 'B'}{_SIGNATURE[1:]}"
+_BAD_SIGNATURE = f"{_HEADER}.{_PAYLOAD}.tampered_signature"
+# How many tokens the uniqueness tests mint
+_TOKEN_BATCH = 1000
+_WRONG_SECRET_TOKEN = jwt.encode(
+    {
+        "sub": str(_FIXED_UUID),
+        "email": "test@example.com",
+        "exp": datetime.now(timezone.utc) + timedelta(hours=1)
+    },
+    "wrong-secret",
+    algorithm=ALGORITHM
+)
+
+
+@pytest.fixture(scope="module")
+def sample_token():
+    """The module's shared token as ``(user_id, email, token)``."""
+    return _FIXED_UUID, "test@example.com", _SAMPLE_TOKEN
 
 
 class TestJWTTokenCreation:
     """Tests for JWT token creation."""
     
-    def test_create_access_token_basic(self):
+    def test_create_access_token_basic(self, sample_token):
         """Test creating a basic access token."""
-        user_id = uuid4()
-        email = "test@example.com"
-        
-        token = create_access_token(user_id, email)
+        _, _, token = sample_token
         
         assert token is not None
         assert isinstance(token, str)
@@ -49,19 +77,16 @@ class TestJWTTokenCreation:
         payload = decode_token_payload(token)
         assert payload is not None
         
-        exp_time = datetime.fromtimestamp(payload["exp"], tz=pytz.timezone('Africa/Nairobi'))
-        iat_time = datetime.fromtimestamp(payload["iat"], tz=pytz.timezone('Africa/Nairobi'))
+        exp_time = datetime.fromtimestamp(payload["exp"], tz=NAIROBI_TZ)
+        iat_time = datetime.fromtimestamp(payload["iat"], tz=NAIROBI_TZ)
         
         # Should be approximately 30 minutes
         time_diff = (exp_time - iat_time).total_seconds() / 60
         assert 29 <= time_diff <= 31  # Allow 1 minute tolerance
     
-    def test_token_contains_correct_payload(self):
+    def test_token_contains_correct_payload(self, sample_token):
         """Test that token contains expected payload data."""
-        user_id = uuid4()
-        email = "test@example.com"
-        
-        token = create_access_token(user_id, email)
+        user_id, email, token = sample_token
         payload = decode_token_payload(token)
         
         assert payload is not None
@@ -72,36 +97,64 @@ class TestJWTTokenCreation:
     
     def test_create_token_with_different_users(self):
         """Test creating tokens for different users produces different tokens."""
-        user1_id = uuid4()
-        user2_id = uuid4()
-        
-        token1 = create_access_token(user1_id, "user1@example.com")
-        token2 = create_access_token(user2_id, "user2@example.com")
-        
-        assert token1 != token2
+        tokens = {create_access_token(uuid4(), f"user{i}@example.com") for i in range(_TOKEN_BATCH)}
         
-        payload1 = decode_token_payload(token1)
-        payload2 = decode_token_payload(token2)
-        
-        assert payload1["sub"] != payload2["sub"]
-        assert payload1["email"] != payload2["email"]
+        assert len(tokens) == _TOKEN_BATCH
+        assert len({decode_token_payload(token)["sub"] for token in tokens}) == _TOKEN_BATCH
 
 
 class TestJWTTokenVerification:
     """Tests for JWT token verification."""
     
-    def test_verify_valid_token(self):
+    def test_verify_valid_token(self, sample_token):
         """Test verifying a valid token."""
-        user_id = uuid4()
-        email = "test@example.com"
-        
-        token = create_access_token(user_id, email)
+        user_id, email, token = sample_token
         payload = verify_access_token(token)
         
         assert payload is not None
         assert payload["sub"] == str(user_id)
         assert payload["email"] == email
     
+    def test_verify_cache_hit_returns_same_payload(self):
+        """Test repeated verification of a token is served from the cache."""
+        user_id = uuid4()
+        email = "cached@example.com"
+        
+        token = create_access_token(user_id, email)
+        first = verify_access_token(token)
+        second = verify_access_token(token)
+        
+        assert first is not None
+        assert second is first
+        assert second["sub"] == str(user_id)
+    
+    def test_invalidate_token_drops_cached_payload(self):
+        """Test an invalidated token is verified afresh."""
+        token = create_access_token(uuid4(), "invalidated@example.com")
+        first = verify_access_token(token)
+        
+        invalidate_token(token)
+        second = verify_access_token(token)
+        
+        assert second is not None
+        assert second is not first
+        assert second == first
+    
+    def test_rejected_token_is_not_cached(self, monkeypatch):
+        """Test a bad signature is checked again rather than cached."""
+        token = f"{_HEADER}.{_PAYLOAD}.{'C' if _SIGNATURE[0] != 'C' else 'D'}{_SIGNATURE[1:]}"
+        calls = []
+        decode = jwt.decode
+        
+        def _counting(*args, **kwargs):
+            calls.append(args)
+            return decode(*args, **kwargs)
+        
+        monkeypatch.setattr("utils.auth.jwt.decode", _counting)
+        assert verify_access_token(token) is None
+        assert verify_access_token(token) is None
+        assert len(calls) == 2
+    
     def test_verify_expired_token(self):
         """Test verifying an expired token returns None."""
         user_id = uuid4()
@@ -122,41 +175,20 @@ class TestJWTTokenVerification:
     
     def test_verify_tampered_token(self):
         """Test verifying a tampered token returns None."""
-        user_id = uuid4()
-        email = "test@example.com"
-        
-        token = create_access_token(user_id, email)
+        payload = verify_access_token(_TAMPERED)
         
-        # Tamper with token
-        parts = token.split('.')
-        if len(parts) == 3:
-            # Change one character in the signature
-            tampered_token = f"{parts[0]}.{parts[1]}.{parts[2][:-1]}X"
-            payload = verify_access_token(tampered_token)
-            
-            assert payload is None
+        assert payload is None
     
     def test_verify_token_with_wrong_signature(self):
         """Test token signed with different secret is rejected."""
-        user_id = uuid4()
-        email = "test@example.com"
-        
-        # Create token with wrong secret
-        payload_data = {
-            "sub": str(user_id),
-            "email": email,
-            "exp": datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')) + timedelta(hours=1)
-        }
-        wrong_token = jwt.encode(payload_data, "wrong-secret", algorithm=ALGORITHM)
-        
-        payload = verify_access_token(wrong_token)
+        payload = verify_access_token(_WRONG_SECRET_TOKEN)
         assert payload is None
     
     def test_verify_token_missing_required_fields(self):
         """Test token missing required fields."""
         # Create token without required fields
         payload_data = {
-            "exp": datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')) + timedelta(hours=1)
+            "exp": datetime.now(timezone.utc).astimezone(NAIROBI_TZ) + timedelta(hours=1)
         }
         incomplete_token = jwt.encode(payload_data, SECRET_KEY, algorithm=ALGORITHM)
         
@@ -166,17 +198,20 @@ class TestJWTTokenVerification:
         assert payload is not None
         assert "sub" not in payload
         assert "email" not in payload
+    
+    def test_verify_token_without_exp_is_rejected(self):
+        """Test a correctly signed token with no exp claim is rejected."""
+        token = jwt.encode({"sub": str(_FIXED_UUID)}, SECRET_KEY, algorithm=ALGORITHM)
+        
+        assert verify_access_token(token) is None
 
 
 class TestTokenPayloadDecoding:
     """Tests for token payload decoding."""
     
-    def test_decode_valid_token(self):
+    def test_decode_valid_token(self, sample_token):
         """Test decoding a valid token payload."""
-        user_id = uuid4()
-        email = "test@example.com"
-        
-        token = create_access_token(user_id, email)
+        user_id, email, token = sample_token
         payload = decode_token_payload(token)
         
         assert payload is not None
@@ -205,20 +240,11 @@ class TestTokenPayloadDecoding:
     
     def test_decode_tampered_token(self):
         """Test decoding a tampered token (signature not verified)."""
-        user_id = uuid4()
-        email = "test@example.com"
-        
-        token = create_access_token(user_id, email)
+        # Tampered signature only, so the payload should still decode
+        payload = decode_token_payload(_BAD_SIGNATURE)
         
-        # Tamper with signature only (payload should still decode)
-        parts = token.split('.')
-        if len(parts) == 3:
-            tampered_token = f"{parts[0]}.{parts[1]}.tampered_signature"
-            payload = decode_token_payload(tampered_token)
-            
-            # Should still decode the payload (signature not checked)
-            assert payload is not None
-            assert payload["sub"] == str(user_id)
+        assert payload is not None
+        assert payload["sub"] == str(_FIXED_UUID)
 
 
 class TestTokenEdgeCases:
@@ -289,21 +315,31 @@ class TestTokenSecurity:
     """Tests for token security features."""
     
     def test_tokens_are_unique(self):
-        """Test that multiple tokens for same user are unique."""
+        """Test that tokens for the same user with different lifetimes are unique."""
         user_id = uuid4()
         email = "test@example.com"
         
-        token1 = create_access_token(user_id, email)
-        token2 = create_access_token(user_id, email)
+        # Minted within the same second, so each differs only by its exp
+        tokens = {
+            create_access_token(user_id, email, timedelta(minutes=i + 1))
+            for i in range(_TOKEN_BATCH)
+        }
         
-        # Tokens should be different due to different iat times
-        assert token1 != token2
+        assert len(tokens) == _TOKEN_BATCH
     
     def test_algorithm_is_secure(self):
         """Test that algorithm used is HS256."""
         from utils.auth import ALGORITHM
         assert ALGORITHM == "HS256"
     
+    @pytest.mark.parametrize("alg", ["none", "HS512"])
+    def test_other_algorithms_are_rejected(self, alg):
+        """Test that tokens signed with anything but HS256 are rejected."""
+        key = None if alg == "none" else SECRET_KEY
+        token = jwt.encode({"sub": str(_FIXED_UUID)}, key, algorithm=alg)
+        
+        assert verify_access_token(token) is None
+    
     def test_secret_key_is_configured(self):
         """Test that secret key is configured."""
         from utils.auth import SECRET_KEY
@@ -315,21 +351,44 @@ class TestTokenSecurity:
         user_id = uuid4()
         email = "test@example.com"
         
-        # Create token that expires in 1 second
-        token = create_access_token(user_id, email, timedelta(seconds=1))
+        token = create_access_token(user_id, email, timedelta(minutes=1))
         
         # Verify it's valid initially
         payload = verify_access_token(token)
         assert payload is not None
         
-        # Wait for expiration
-        import time
-        time.sleep(2)
+        # Re-sign the same claims with exp already passed, instead of sleeping
+        expired_token = jwt.encode(
+            {**payload, "exp": payload["iat"] - 1},
+            SECRET_KEY,
+            algorithm=ALGORITHM
+        )
         
         # Verify it's now invalid
-        payload = verify_access_token(token)
+        payload = verify_access_token(expired_token)
         assert payload is None
 
 
+class TestAuthorizationHeader:
+    """Tests for reading the token from the Authorization header."""
+    
+    @pytest.mark.parametrize("scheme", ["Bearer ", "bearer ", "BEARER  "])
+    def test_bearer_scheme_accepted(self, sample_token, scheme):
+        """Test the Bearer scheme is matched case-insensitively."""
+        user_id, _, token = sample_token
+        assert _authenticated_user_id(None, f"{scheme}{token}") == user_id
+    
+    @pytest.mark.parametrize("header", [None, "", "Bearer", "Bearer ", "Basic abc", "Bearertoken"])
+    def test_missing_or_other_scheme_rejected(self, header):
+        """Test headers without a Bearer token are rejected with 401."""
+        with pytest.raises(HTTPException) as exc_info:
+            _authenticated_user_id(None, header)
+        assert exc_info.value.status_code == 401
+    
+    def test_anonymous_optional_user_skips_database(self):
+        """Test an anonymous request resolves to None without a session."""
+        assert asyncio.run(get_current_user_optional(None, None, db_session=None)) is None
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "-s"])
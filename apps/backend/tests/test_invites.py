@@ -12,84 +12,76 @@ Tests:
 """
 
 import pytest
-from fastapi.testclient import TestClient
+import secrets
+from collections import Counter
 from datetime import datetime, timedelta
-from uuid import uuid4
-import sys
-import os
+from functools import lru_cache
+from uuid import UUID, uuid4
 
-# Add backend directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from api.main import app
 from models import User, Tree, Membership, Invite
-from utils.test_db import get_test_session, get_test_db_url
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-# Create test client
-client = TestClient(app)
-
-# Test database setup
-TEST_DB_URL = get_test_db_url()
-test_engine = create_engine(TEST_DB_URL)
-TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
-
-
-@pytest.fixture(scope="function")
-def test_db():
-    """Create a test database session."""
-    session = TestSessionLocal()
-    try:
-        yield session
-    finally:
-        # Cleanup
-        session.query(Invite).delete()
-        session.query(Membership).delete()
-        session.query(Tree).delete()
-        session.query(User).delete()
-        session.commit()
-        session.close()
+from utils.auth import create_access_token
+from utils.dependencies import SESSION_COOKIE_NAME
+
+# Fixed user IDs: every test rolls back, so the same IDs can be reused and
+# each user's token only has to be signed once per run.
+CUSTODIAN_ID = uuid4()
+CONTRIBUTOR_ID = uuid4()
+INVITEE_ID = uuid4()
+
+
+@lru_cache(maxsize=None)
+def _token_for(user_id: UUID, email: str) -> str:
+    """Sign an access token once per (user, email) for the whole run."""
+    return create_access_token(user_id, email)
+
+
+def _make_invite(session, tree: Tree, email: str, role: str) -> Invite:
+    """Insert an active invite directly, for tests that only need one to exist."""
+    invite = Invite(
+        id=uuid4(),
+        tree_id=tree.id,
+        email=email,
+        role=role,
+        token=secrets.token_urlsafe(32),
+        expires_at=datetime.utcnow() + timedelta(days=7),
+        created_by=tree.created_by
+    )
+    session.add(invite)
+    session.commit()
+    return invite
 
 
 @pytest.fixture
-def test_users(test_db):
+def test_users(db_session):
     """Create test users with authentication tokens."""
     # Custodian user
     custodian = User(
-        id=uuid4(),
+        id=CUSTODIAN_ID,
         email="custodian@test.com",
         display_name="Custodian User"
     )
-    test_db.add(custodian)
     
     # Contributor user
     contributor = User(
-        id=uuid4(),
+        id=CONTRIBUTOR_ID,
         email="contributor@test.com",
         display_name="Contributor User"
     )
-    test_db.add(contributor)
     
     # Invitee user (will accept invite)
     invitee = User(
-        id=uuid4(),
+        id=INVITEE_ID,
         email="invitee@test.com",
         display_name="Invitee User"
     )
-    test_db.add(invitee)
     
-    test_db.commit()
-    test_db.refresh(custodian)
-    test_db.refresh(contributor)
-    test_db.refresh(invitee)
+    db_session.add_all([custodian, contributor, invitee])
+    db_session.commit()
     
     # Generate tokens (simplified - in real tests you'd use auth flow)
-    from utils.auth import create_access_token
-    
-    custodian_token = create_access_token({"sub": str(custodian.id), "email": custodian.email})
-    contributor_token = create_access_token({"sub": str(contributor.id), "email": contributor.email})
-    invitee_token = create_access_token({"sub": str(invitee.id), "email": invitee.email})
+    custodian_token = _token_for(custodian.id, custodian.email)
+    contributor_token = _token_for(contributor.id, contributor.email)
+    invitee_token = _token_for(invitee.id, invitee.email)
     
     return {
         "custodian": (custodian, custodian_token),
@@ -99,7 +91,7 @@ def test_users(test_db):
 
 
 @pytest.fixture
-def test_tree(test_db, test_users):
+def test_tree(db_session, test_users):
     """Create a test tree with memberships."""
     custodian, _ = test_users["custodian"]
     contributor, _ = test_users["contributor"]
@@ -110,9 +102,6 @@ def test_tree(test_db, test_users):
         description="A test family tree for invitation testing",
         created_by=custodian.id
     )
-    test_db.add(tree)
-    test_db.commit()
-    test_db.refresh(tree)
     
     # Add custodian membership
     custodian_membership = Membership(
@@ -120,7 +109,6 @@ def test_tree(test_db, test_users):
         tree_id=tree.id,
         role="custodian"
     )
-    test_db.add(custodian_membership)
     
     # Add contributor membership
     contributor_membership = Membership(
@@ -128,14 +116,15 @@ def test_tree(test_db, test_users):
         tree_id=tree.id,
         role="contributor"
     )
-    test_db.add(contributor_membership)
     
-    test_db.commit()
+    # The unit of work inserts the tree before the memberships that reference it
+    db_session.add_all([tree, custodian_membership, contributor_membership])
+    db_session.commit()
     
     return tree
 
 
-def test_send_invite_success(test_db, test_tree, test_users):
+def test_send_invite_success(client, db_session, test_tree, test_users):
     """Test 1: Send invitation successfully (custodian)."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
@@ -149,7 +138,7 @@ def test_send_invite_success(test_db, test_tree, test_users):
     response = client.post(
         "/api/invites",
         json=invite_data,
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     
     assert response.status_code == 201
@@ -163,12 +152,12 @@ def test_send_invite_success(test_db, test_tree, test_users):
     assert data["accepted_at"] is None
     
     # Verify invite in database
-    invite = test_db.query(Invite).filter(Invite.token == data["token"]).first()
+    invite = db_session.query(Invite).filter(Invite.token == data["token"]).first()
     assert invite is not None
     assert invite.email == "newuser@test.com"
 
 
-def test_send_invite_non_custodian_fails(test_db, test_tree, test_users):
+def test_send_invite_non_custodian_fails(client, db_session, test_tree, test_users):
     """Test 2: Non-custodian cannot send invites."""
     tree = test_tree
     contributor, contributor_token = test_users["contributor"]
@@ -182,14 +171,14 @@ def test_send_invite_non_custodian_fails(test_db, test_tree, test_users):
     response = client.post(
         "/api/invites",
         json=invite_data,
-        cookies={"access_token": contributor_token}
+        cookies={SESSION_COOKIE_NAME: contributor_token}
     )
     
     assert response.status_code == 403
     assert "custodian" in response.json()["detail"].lower()
 
 
-def test_send_invite_already_member_fails(test_db, test_tree, test_users):
+def test_send_invite_already_member_fails(client, db_session, test_tree, test_users):
     """Test 3: Cannot invite existing member."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
@@ -204,14 +193,14 @@ def test_send_invite_already_member_fails(test_db, test_tree, test_users):
     response = client.post(
         "/api/invites",
         json=invite_data,
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     
     assert response.status_code == 400
     assert "already a member" in response.json()["detail"].lower()
 
 
-def test_send_invite_duplicate_active_fails(test_db, test_tree, test_users):
+def test_send_invite_duplicate_active_fails(client, db_session, test_tree, test_users):
     """Test 4: Cannot send duplicate active invite."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
@@ -226,7 +215,7 @@ def test_send_invite_duplicate_active_fails(test_db, test_tree, test_users):
     response1 = client.post(
         "/api/invites",
         json=invite_data,
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     assert response1.status_code == 201
     
@@ -234,32 +223,20 @@ def test_send_invite_duplicate_active_fails(test_db, test_tree, test_users):
     response2 = client.post(
         "/api/invites",
         json=invite_data,
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     
     assert response2.status_code == 409
     assert "already exists" in response2.json()["detail"].lower()
 
 
-def test_view_invite_success(test_db, test_tree, test_users):
+def test_view_invite_success(client, db_session, test_tree, test_users):
     """Test 5: View invite details (public endpoint)."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
     
     # Create invite
-    invite_data = {
-        "tree_id": str(tree.id),
-        "email": "newuser@test.com",
-        "role": "contributor"
-    }
-    
-    response = client.post(
-        "/api/invites",
-        json=invite_data,
-        cookies={"access_token": custodian_token}
-    )
-    
-    token = response.json()["token"]
+    token = _make_invite(db_session, tree, "newuser@test.com", "contributor").token
     
     # View invite (no auth required)
     response = client.get(f"/api/invites/{token}")
@@ -274,7 +251,7 @@ def test_view_invite_success(test_db, test_tree, test_users):
     assert "inviter_name" in data
 
 
-def test_view_invite_expired_fails(test_db, test_tree, test_users):
+def test_view_invite_expired_fails(client, db_session, test_tree, test_users):
     """Test 6: Cannot view expired invite."""
     tree = test_tree
     custodian, _ = test_users["custodian"]
@@ -288,8 +265,8 @@ def test_view_invite_expired_fails(test_db, test_tree, test_users):
         token="expired-token-12345",
         expires_at=datetime.utcnow() - timedelta(days=1)  # Expired yesterday
     )
-    test_db.add(expired_invite)
-    test_db.commit()
+    db_session.add(expired_invite)
+    db_session.commit()
     
     response = client.get(f"/api/invites/{expired_invite.token}")
     
@@ -297,31 +274,19 @@ def test_view_invite_expired_fails(test_db, test_tree, test_users):
     assert "expired" in response.json()["detail"].lower()
 
 
-def test_accept_invite_success(test_db, test_tree, test_users):
+def test_accept_invite_success(client, db_session, test_tree, test_users):
     """Test 7: Accept invitation successfully."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
     invitee, invitee_token = test_users["invitee"]
     
     # Create invite for invitee
-    invite_data = {
-        "tree_id": str(tree.id),
-        "email": invitee.email,
-        "role": "contributor"
-    }
-    
-    response = client.post(
-        "/api/invites",
-        json=invite_data,
-        cookies={"access_token": custodian_token}
-    )
-    
-    token = response.json()["token"]
+    token = _make_invite(db_session, tree, invitee.email, "contributor").token
     
     # Accept invite
     response = client.post(
         f"/api/invites/{token}/accept",
-        cookies={"access_token": invitee_token}
+        cookies={SESSION_COOKIE_NAME: invitee_token}
     )
     
     assert response.status_code == 200
@@ -331,7 +296,7 @@ def test_accept_invite_success(test_db, test_tree, test_users):
     assert data["role"] == "contributor"
     
     # Verify membership created
-    membership = test_db.query(Membership).filter(
+    membership = db_session.query(Membership).filter(
         Membership.user_id == invitee.id,
         Membership.tree_id == tree.id
     ).first()
@@ -340,65 +305,41 @@ def test_accept_invite_success(test_db, test_tree, test_users):
     assert membership.role == "contributor"
     
     # Verify invite marked as accepted
-    invite = test_db.query(Invite).filter(Invite.token == token).first()
+    invite = db_session.query(Invite).filter(Invite.token == token).first()
     assert invite.accepted_at is not None
 
 
-def test_accept_invite_wrong_email_fails(test_db, test_tree, test_users):
+def test_accept_invite_wrong_email_fails(client, db_session, test_tree, test_users):
     """Test 8: Cannot accept invite with wrong email."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
     contributor, contributor_token = test_users["contributor"]
     
     # Create invite for different email
-    invite_data = {
-        "tree_id": str(tree.id),
-        "email": "different@test.com",
-        "role": "viewer"
-    }
-    
-    response = client.post(
-        "/api/invites",
-        json=invite_data,
-        cookies={"access_token": custodian_token}
-    )
-    
-    token = response.json()["token"]
+    token = _make_invite(db_session, tree, "different@test.com", "viewer").token
     
     # Try to accept with wrong user
     response = client.post(
         f"/api/invites/{token}/accept",
-        cookies={"access_token": contributor_token}  # Wrong user
+        cookies={SESSION_COOKIE_NAME: contributor_token}  # Wrong user
     )
     
     assert response.status_code == 400
     assert "invitation is for" in response.json()["detail"].lower()
 
 
-def test_resend_invite_success(test_db, test_tree, test_users):
+def test_resend_invite_success(client, db_session, test_tree, test_users):
     """Test 9: Resend invitation successfully."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
     
     # Create invite
-    invite_data = {
-        "tree_id": str(tree.id),
-        "email": "newuser@test.com",
-        "role": "viewer"
-    }
-    
-    response = client.post(
-        "/api/invites",
-        json=invite_data,
-        cookies={"access_token": custodian_token}
-    )
-    
-    token = response.json()["token"]
+    token = _make_invite(db_session, tree, "newuser@test.com", "viewer").token
     
     # Resend invite
     response = client.post(
         f"/api/invites/{token}/resend",
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     
     assert response.status_code == 200
@@ -408,7 +349,7 @@ def test_resend_invite_success(test_db, test_tree, test_users):
     assert data["token"] == token  # Same token for non-expired
 
 
-def test_resend_expired_creates_new(test_db, test_tree, test_users):
+def test_resend_expired_creates_new(client, db_session, test_tree, test_users):
     """Test 10: Resending expired invite creates new invite."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
@@ -422,15 +363,15 @@ def test_resend_expired_creates_new(test_db, test_tree, test_users):
         token="expired-token-12345",
         expires_at=datetime.utcnow() - timedelta(days=1)
     )
-    test_db.add(expired_invite)
-    test_db.commit()
+    db_session.add(expired_invite)
+    db_session.commit()
     
     old_token = expired_invite.token
     
     # Resend expired invite
     response = client.post(
         f"/api/invites/{old_token}/resend",
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     
     assert response.status_code == 200
@@ -441,95 +382,64 @@ def test_resend_expired_creates_new(test_db, test_tree, test_users):
     assert data["expires_at"] > datetime.utcnow().isoformat()  # New expiry
 
 
-def test_list_tree_invites_success(test_db, test_tree, test_users):
+def test_list_tree_invites_success(client, db_session, test_tree, test_users):
     """Test 11: List all invites for a tree."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
     
     # Create multiple invites
-    for i in range(3):
-        invite_data = {
-            "tree_id": str(tree.id),
-            "email": f"user{i}@test.com",
-            "role": "viewer"
-        }
-        client.post(
-            "/api/invites",
-            json=invite_data,
-            cookies={"access_token": custodian_token}
-        )
+    expected_emails = [f"user{i}@test.com" for i in range(3)]
+    for email in expected_emails:
+        _make_invite(db_session, tree, email, "viewer")
     
     # List invites
     response = client.get(
         f"/api/trees/{tree.id}/invites",
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     
     assert response.status_code == 200
     data = response.json()
     
-    assert len(data) == 3
-    assert all(invite["tree_id"] == str(tree.id) for invite in data)
+    # Counter also catches a missing or duplicated invite, not just a wrong one
+    assert Counter(invite["email"] for invite in data) == Counter(expected_emails)
+    assert {invite["tree_id"] for invite in data} == {str(tree.id)}
 
 
-def test_cancel_invite_success(test_db, test_tree, test_users):
+def test_cancel_invite_success(client, db_session, test_tree, test_users):
     """Test 12: Cancel invitation successfully."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
     
     # Create invite
-    invite_data = {
-        "tree_id": str(tree.id),
-        "email": "cancel@test.com",
-        "role": "viewer"
-    }
-    
-    response = client.post(
-        "/api/invites",
-        json=invite_data,
-        cookies={"access_token": custodian_token}
-    )
-    
-    token = response.json()["token"]
+    token = _make_invite(db_session, tree, "cancel@test.com", "viewer").token
     
     # Cancel invite
     response = client.delete(
         f"/api/invites/{token}",
-        cookies={"access_token": custodian_token}
+        cookies={SESSION_COOKIE_NAME: custodian_token}
     )
     
     assert response.status_code == 204
     
     # Verify invite deleted
-    invite = test_db.query(Invite).filter(Invite.token == token).first()
+    invite = db_session.query(Invite).filter(Invite.token == token).first()
     assert invite is None
 
 
-def test_cancel_invite_non_custodian_fails(test_db, test_tree, test_users):
+def test_cancel_invite_non_custodian_fails(client, db_session, test_tree, test_users):
     """Test 13: Non-custodian cannot cancel invites."""
     tree = test_tree
     custodian, custodian_token = test_users["custodian"]
     contributor, contributor_token = test_users["contributor"]
     
     # Create invite as custodian
-    invite_data = {
-        "tree_id": str(tree.id),
-        "email": "cancel@test.com",
-        "role": "viewer"
-    }
-    
-    response = client.post(
-        "/api/invites",
-        json=invite_data,
-        cookies={"access_token": custodian_token}
-    )
-    
-    token = response.json()["token"]
+    token = _make_invite(db_session, tree, "cancel@test.com", "viewer").token
     
     # Try to cancel as contributor
     response = client.delete(
         f"/api/invites/{token}",
-        cookies={"access_token": contributor_token}
+        cookies={SESSION_COOKIE_NAME: contributor_token}
     )
     
     assert response.status_code == 403
@@ -1,90 +1,73 @@
 """Tests for role management and membership endpoints."""
 
 import pytest
-from fastapi.testclient import TestClient
 from datetime import datetime, timedelta
-import sys
-import os
+from functools import lru_cache
+from typing import Optional
 
-# Add backend directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from api.main import app
 from models import User, Tree, Membership
-from utils.test_db import get_test_session, get_test_db_url
+from utils.test_db import TestSessionLocal
 from utils.auth import create_access_token
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from uuid import uuid4
-
-# Create test client
-client = TestClient(app)
+from utils.db import get_db
+from sqlalchemy import event, select
+from uuid import UUID, uuid4
 
-# Test database setup
-TEST_DB_URL = get_test_db_url()
-test_engine = create_engine(TEST_DB_URL)
-TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
-
-@pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database session for each test."""
-    session = TestSessionLocal()
+@pytest.fixture(scope="module")
+def seed_session(db_connection):
+    """Session for the rows shared by every test in this module.
+    
+    It writes into the outer transaction, before any per-test SAVEPOINT,
+    so the users and tree survive each test's rollback.
+    """
+    session = TestSessionLocal(bind=db_connection, expire_on_commit=False)
     try:
         yield session
     finally:
-        # Cleanup
-        session.query(Membership).delete()
-        session.query(Tree).delete()
-        session.query(User).delete()
-        session.commit()
         session.close()
 
 
-@pytest.fixture
-def custodian_user(db_session):
+@pytest.fixture(scope="module")
+def custodian_user(seed_session):
     """Create a custodian user."""
     user = User(
         id=uuid4(),
         email="custodian@example.com",
         display_name="Custodian User"
     )
-    db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    seed_session.add(user)
+    seed_session.commit()
     return user
 
 
-@pytest.fixture
-def contributor_user(db_session):
+@pytest.fixture(scope="module")
+def contributor_user(seed_session):
     """Create a contributor user."""
     user = User(
         id=uuid4(),
         email="contributor@example.com",
         display_name="Contributor User"
     )
-    db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    seed_session.add(user)
+    seed_session.commit()
     return user
 
 
-@pytest.fixture
-def viewer_user(db_session):
+@pytest.fixture(scope="module")
+def viewer_user(seed_session):
     """Create a viewer user."""
     user = User(
         id=uuid4(),
         email="viewer@example.com",
         display_name="Viewer User"
     )
-    db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    seed_session.add(user)
+    seed_session.commit()
     return user
 
 
-@pytest.fixture
-def test_tree(db_session, custodian_user):
+@pytest.fixture(scope="module")
+def test_tree(seed_session, custodian_user):
     """Create a test tree with custodian."""
     tree = Tree(
         id=uuid4(),
@@ -100,7 +83,7 @@ def test_tree(db_session, custodian_user):
         },
         created_by=custodian_user.id
     )
-    db_session.add(tree)
+    seed_session.add(tree)
     
     # Add custodian membership
     membership = Membership(
@@ -109,24 +92,49 @@ def test_tree(db_session, custodian_user):
         tree_id=tree.id,
         role="custodian"
     )
-    db_session.add(membership)
-    db_session.commit()
-    db_session.refresh(tree)
+    seed_session.add(membership)
+    seed_session.commit()
     
     return tree
 
 
+def bulk_add_memberships(session, rows: list[dict]) -> None:
+    """Insert several memberships in one executemany and commit.
+    
+    Args:
+        session: Database session
+        rows: Membership column values, one dict per row
+    """
+    session.execute(Membership.__table__.insert(), rows)
+    session.commit()
+
+
+def _role_of(session, user_id: UUID, tree_id: UUID) -> Optional[str]:
+    """Read a membership's role straight from the database, or None if absent."""
+    return session.execute(
+        select(Membership.role).where(
+            Membership.user_id == user_id,
+            Membership.tree_id == tree_id
+        )
+    ).scalar_one_or_none()
+
+
+@lru_cache(maxsize=None)
+def _token(user_id: str, email: str) -> str:
+    """Sign one access token per user; the module's users never change."""
+    return create_access_token(UUID(user_id), email)
+
+
 def get_auth_headers(user: User) -> dict:
     """Get authentication headers for a user."""
-    token = create_access_token({"sub": str(user.id), "email": user.email})
-    return {"Authorization": f"Bearer {token}"}
+    return {"Authorization": f"Bearer {_token(str(user.id), user.email)}"}
 
 
 class TestListTreeMemberships:
     """Tests for GET /api/trees/{tree_id}/memberships"""
     
     def test_list_memberships_as_custodian(
-        self, db_session, custodian_user, contributor_user, test_tree
+        self, client, db_session, custodian_user, contributor_user, test_tree
     ):
         """Custodian can list all memberships."""
         # Add contributor to tree
@@ -157,7 +165,7 @@ class TestListTreeMemberships:
         assert contributor_data["user_email"] == contributor_user.email
     
     def test_list_memberships_as_contributor(
-        self, db_session, custodian_user, contributor_user, test_tree
+        self, client, db_session, custodian_user, contributor_user, test_tree
     ):
         """Contributor can also list memberships."""
         # Add contributor to tree
@@ -179,7 +187,7 @@ class TestListTreeMemberships:
         data = response.json()
         assert len(data) == 2
     
-    def test_list_memberships_not_a_member(self, db_session, viewer_user, test_tree):
+    def test_list_memberships_not_a_member(self, client, db_session, viewer_user, test_tree):
         """Non-member cannot list memberships."""
         response = client.get(
             f"/api/trees/{test_tree.id}/memberships",
@@ -188,69 +196,64 @@ class TestListTreeMemberships:
         
         assert response.status_code == 403
         assert "do not have access" in response.json()["detail"]
+    
+    def test_list_memberships_unknown_tree(self, client, db_session, custodian_user):
+        """Listing memberships of a tree that doesn't exist is a 404."""
+        response = client.get(
+            f"/api/trees/{uuid4()}/memberships",
+            headers=get_auth_headers(custodian_user)
+        )
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Tree not found"
 
 
 class TestUpdateMembershipRole:
     """Tests for PATCH /api/memberships/{user_id}/{tree_id}"""
     
-    def test_promote_contributor_to_custodian(
-        self, db_session, custodian_user, contributor_user, test_tree
+    @pytest.mark.parametrize(
+        "initial_role, new_role, expected_status",
+        [
+            ("contributor", "custodian", 200),
+            ("custodian", "contributor", 200),
+            ("contributor", "admin", 400),
+        ],
+        ids=["promote-contributor", "demote-second-custodian", "invalid-role"]
+    )
+    def test_update_role(
+        self, client, db_session, custodian_user, contributor_user, test_tree,
+        initial_role, new_role, expected_status
     ):
-        """Custodian can promote contributor to custodian."""
-        # Add contributor to tree
+        """Custodian can change another member's role to any valid role."""
         membership = Membership(
             id=uuid4(),
             user_id=contributor_user.id,
             tree_id=test_tree.id,
-            role="contributor"
+            role=initial_role
         )
         db_session.add(membership)
         db_session.commit()
-        
+    
         response = client.patch(
             f"/api/memberships/{contributor_user.id}/{test_tree.id}",
-            json={"role": "custodian"},
+            json={"role": new_role},
             headers=get_auth_headers(custodian_user)
         )
-        
-        assert response.status_code == 200
+    
+        assert response.status_code == expected_status
+        if expected_status != 200:
+            assert "invalid role" in response.json()["detail"].lower()
+            return
+    
         data = response.json()
-        assert data["role"] == "custodian"
+        assert data["role"] == new_role
         assert data["user_id"] == str(contributor_user.id)
-        
-        # Verify in database
-        updated_membership = db_session.query(Membership).filter(
-            Membership.user_id == contributor_user.id,
-            Membership.tree_id == test_tree.id
-        ).first()
-        assert updated_membership.role == "custodian"
     
-    def test_demote_custodian_to_contributor(
-        self, db_session, custodian_user, contributor_user, test_tree
-    ):
-        """Can demote custodian when there are multiple custodians."""
-        # Add second custodian
-        membership = Membership(
-            id=uuid4(),
-            user_id=contributor_user.id,
-            tree_id=test_tree.id,
-            role="custodian"
-        )
-        db_session.add(membership)
-        db_session.commit()
-        
-        response = client.patch(
-            f"/api/memberships/{contributor_user.id}/{test_tree.id}",
-            json={"role": "contributor"},
-            headers=get_auth_headers(custodian_user)
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["role"] == "contributor"
+        # Verify in database
+        assert _role_of(db_session, contributor_user.id, test_tree.id) == new_role
     
     def test_cannot_remove_last_custodian(
-        self, db_session, custodian_user, test_tree
+        self, client, db_session, custodian_user, test_tree
     ):
         """Cannot demote the last custodian."""
         response = client.patch(
@@ -262,41 +265,15 @@ class TestUpdateMembershipRole:
         assert response.status_code == 400
         assert "last custodian" in response.json()["detail"].lower()
     
-    def test_invalid_role(self, db_session, custodian_user, contributor_user, test_tree):
-        """Cannot set invalid role."""
-        # Add contributor
-        membership = Membership(
-            id=uuid4(),
-            user_id=contributor_user.id,
-            tree_id=test_tree.id,
-            role="contributor"
-        )
-        db_session.add(membership)
-        db_session.commit()
-        
-        response = client.patch(
-            f"/api/memberships/{contributor_user.id}/{test_tree.id}",
-            json={"role": "admin"},  # Invalid role
-            headers=get_auth_headers(custodian_user)
-        )
-        
-        assert response.status_code == 400
-        assert "invalid role" in response.json()["detail"].lower()
-    
     def test_contributor_cannot_update_roles(
-        self, db_session, custodian_user, contributor_user, viewer_user, test_tree
+        self, client, db_session, custodian_user, contributor_user, viewer_user, test_tree
     ):
         """Contributor cannot update roles (custodian-only)."""
         # Add contributor and viewer
-        for user, role in [(contributor_user, "contributor"), (viewer_user, "viewer")]:
-            membership = Membership(
-                id=uuid4(),
-                user_id=user.id,
-                tree_id=test_tree.id,
-                role=role
-            )
-            db_session.add(membership)
-        db_session.commit()
+        bulk_add_memberships(db_session, [
+            {"id": uuid4(), "user_id": user.id, "tree_id": test_tree.id, "role": role}
+            for user, role in [(contributor_user, "contributor"), (viewer_user, "viewer")]
+        ])
         
         response = client.patch(
             f"/api/memberships/{viewer_user.id}/{test_tree.id}",
@@ -308,7 +285,7 @@ class TestUpdateMembershipRole:
         assert "custodian" in response.json()["detail"].lower()
     
     def test_update_nonexistent_membership(
-        self, db_session, custodian_user, contributor_user, test_tree
+        self, client, db_session, custodian_user, contributor_user, test_tree
     ):
         """Cannot update membership that doesn't exist."""
         response = client.patch(
@@ -324,37 +301,33 @@ class TestUpdateMembershipRole:
 class TestRemoveMembership:
     """Tests for DELETE /api/memberships/{user_id}/{tree_id}"""
     
-    def test_remove_contributor(
-        self, db_session, custodian_user, contributor_user, test_tree
+    @pytest.mark.parametrize("role", ["contributor", "custodian"])
+    def test_remove_member(
+        self, client, db_session, custodian_user, contributor_user, test_tree, role
     ):
-        """Custodian can remove contributor."""
-        # Add contributor
+        """Custodian can remove a contributor, or a custodian while another remains."""
         membership = Membership(
             id=uuid4(),
             user_id=contributor_user.id,
             tree_id=test_tree.id,
-            role="contributor"
+            role=role
         )
         db_session.add(membership)
         db_session.commit()
-        
+    
         response = client.delete(
             f"/api/memberships/{contributor_user.id}/{test_tree.id}",
             headers=get_auth_headers(custodian_user)
         )
-        
+    
         assert response.status_code == 200
         assert "removed successfully" in response.json()["message"]
-        
+    
         # Verify membership is gone
-        removed = db_session.query(Membership).filter(
-            Membership.user_id == contributor_user.id,
-            Membership.tree_id == test_tree.id
-        ).first()
-        assert removed is None
+        assert _role_of(db_session, contributor_user.id, test_tree.id) is None
     
     def test_cannot_remove_last_custodian(
-        self, db_session, custodian_user, test_tree
+        self, client, db_session, custodian_user, test_tree
     ):
         """Cannot remove the last custodian."""
         response = client.delete(
@@ -365,41 +338,15 @@ class TestRemoveMembership:
         assert response.status_code == 400
         assert "last custodian" in response.json()["detail"].lower()
     
-    def test_remove_custodian_when_multiple_exist(
-        self, db_session, custodian_user, contributor_user, test_tree
-    ):
-        """Can remove custodian when there are multiple."""
-        # Add second custodian
-        membership = Membership(
-            id=uuid4(),
-            user_id=contributor_user.id,
-            tree_id=test_tree.id,
-            role="custodian"
-        )
-        db_session.add(membership)
-        db_session.commit()
-        
-        response = client.delete(
-            f"/api/memberships/{contributor_user.id}/{test_tree.id}",
-            headers=get_auth_headers(custodian_user)
-        )
-        
-        assert response.status_code == 200
-    
     def test_contributor_cannot_remove_members(
-        self, db_session, custodian_user, contributor_user, viewer_user, test_tree
+        self, client, db_session, custodian_user, contributor_user, viewer_user, test_tree
     ):
         """Contributor cannot remove members (custodian-only)."""
         # Add contributor and viewer
-        for user, role in [(contributor_user, "contributor"), (viewer_user, "viewer")]:
-            membership = Membership(
-                id=uuid4(),
-                user_id=user.id,
-                tree_id=test_tree.id,
-                role=role
-            )
-            db_session.add(membership)
-        db_session.commit()
+        bulk_add_memberships(db_session, [
+            {"id": uuid4(), "user_id": user.id, "tree_id": test_tree.id, "role": role}
+            for user, role in [(contributor_user, "contributor"), (viewer_user, "viewer")]
+        ])
         
         response = client.delete(
             f"/api/memberships/{viewer_user.id}/{test_tree.id}",
@@ -445,11 +392,12 @@ class TestPermissionUtilities:
         assert not is_custodian(contributor_user.id, test_tree.id, db_session)
     
     def test_count_custodians_function(self, db_session, custodian_user, contributor_user, test_tree):
-        """Test count_custodians utility function."""
-        from utils.permissions import count_custodians
+        """Test count_custodians and has_multiple_custodians utility functions."""
+        from utils.permissions import count_custodians, has_multiple_custodians
         
         # Initially one custodian
         assert count_custodians(test_tree.id, db_session) == 1
+        assert not has_multiple_custodians(test_tree.id, db_session)
         
         # Add second custodian
         membership = Membership(
@@ -462,6 +410,104 @@ class TestPermissionUtilities:
         db_session.commit()
         
         assert count_custodians(test_tree.id, db_session) == 2
+        assert has_multiple_custodians(test_tree.id, db_session)
+    
+    def test_role_level(self, db_session, custodian_user, contributor_user, viewer_user, test_tree):
+        """Test Membership.role_level on instances and in queries."""
+        from models import RoleLevel
+        
+        for user, role in ((contributor_user, "contributor"), (viewer_user, "viewer")):
+            db_session.add(Membership(id=uuid4(), user_id=user.id, tree_id=test_tree.id, role=role))
+        db_session.commit()
+        
+        memberships = db_session.query(Membership).filter(Membership.tree_id == test_tree.id).all()
+        assert {m.role: m.role_level for m in memberships} == {
+            "custodian": RoleLevel.custodian,
+            "contributor": RoleLevel.contributor,
+            "viewer": RoleLevel.viewer,
+        }
+        
+        at_least_contributor = db_session.query(Membership.role).filter(
+            Membership.tree_id == test_tree.id,
+            Membership.role_level >= RoleLevel.contributor
+        ).all()
+        assert sorted(role for role, in at_least_contributor) == ["contributor", "custodian"]
+    
+    def test_membership_memoized_per_request(self, db_session, custodian_user, viewer_user, test_tree):
+        """Test repeated checks within one request reuse the first lookup."""
+        from starlette.requests import Request
+        from utils.permissions import get_membership, is_custodian, require_membership
+        
+        request = Request({"type": "http"})
+        statements = []
+        
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+        
+        event.listen(db_session.connection(), "before_cursor_execute", listener)
+        try:
+            membership = require_membership(custodian_user.id, test_tree.id, db_session, "custodian", request)
+            assert get_membership(custodian_user.id, test_tree.id, db_session, request) is membership
+            assert is_custodian(custodian_user.id, test_tree.id, db_session, request)
+            
+            # "Not a member" is remembered too
+            assert get_membership(viewer_user.id, test_tree.id, db_session, request) is None
+            assert get_membership(viewer_user.id, test_tree.id, db_session, request) is None
+        finally:
+            event.remove(db_session.connection(), "before_cursor_execute", listener)
+        
+        assert len(statements) == 2
+
+
+
+@pytest.fixture(scope="module")
+def role_app():
+    """A bare app with one custodian-only route guarded by require_tree_role."""
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+    from utils.dependencies import require_tree_role
+    
+    guarded = FastAPI()
+    
+    @guarded.get("/trees/{tree_id}/guarded")
+    def guarded_route(tree_id: UUID, user: User = Depends(require_tree_role("custodian"))):
+        return {"user_id": str(user.id)}
+    
+    with TestClient(guarded) as client:
+        yield guarded, client
+
+
+class TestRequireTreeRole:
+    """Tests for the require_tree_role dependency."""
+    
+    @pytest.mark.parametrize(
+        "who, tree, expected",
+        [
+            ("custodian", "test_tree", 200),
+            ("contributor", "test_tree", 403),
+            ("viewer", "test_tree", 403),
+            ("custodian", "unknown", 404),
+        ],
+        ids=["custodian", "contributor", "non-member", "unknown-tree"]
+    )
+    def test_require_tree_role(
+        self, request, role_app, db_session, custodian_user, contributor_user, test_tree,
+        who, tree, expected
+    ):
+        """Only custodians get through; a missing tree is 404, not 403."""
+        guarded, client = role_app
+        guarded.dependency_overrides[get_db] = lambda: db_session
+        bulk_add_memberships(db_session, [
+            {"id": uuid4(), "user_id": contributor_user.id, "tree_id": test_tree.id, "role": "contributor"}
+        ])
+        user = request.getfixturevalue(f"{who}_user")
+        tree_id = test_tree.id if tree == "test_tree" else uuid4()
+        
+        response = client.get(f"/trees/{tree_id}/guarded", headers=get_auth_headers(user))
+        
+        assert response.status_code == expected
+        if expected == 200:
+            assert response.json()["user_id"] == str(user.id)
 
 
 if __name__ == "__main__":
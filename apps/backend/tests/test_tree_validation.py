@@ -1,207 +1,331 @@
 """Test tree settings validation logic.
 
-Run with: pytest test_tree_validation.py -v
+Run with: pytest tests/test_tree_validation.py -v
 """
 
+import operator
 import pytest
-from uuid import uuid4
-from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from hypothesis import given, settings, strategies as st
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from typing import List, Optional
+from uuid import UUID, uuid4
 
-# Mock imports for testing
+import models
+from schemas import TreeSettings
+from utils.db import Base
+from utils.tree_validation import (
+    TreeQueryContext,
+    analyze_settings_change,
+    get_settings_change_impact,
+    validate_settings_change,
+    _check_monogamy_violations,
+    _check_same_sex_violations,
+    _check_single_parent_violations,
+    _check_multi_parent_violations,
+    _check_max_spouses_violations,
+    _check_max_parents_violations,
+)
+
+
+# Rows for models.Member and models.Relationship, inserted into SQLite for
+# each test. Slots keep large generated trees cheap to build
+@dataclass(slots=True)
 class MockMember:
-    def __init__(self, id, tree_id, name, gender=None):
-        self.id = id
-        self.tree_id = tree_id
-        self.name = name
-        self.gender = gender
+    id: UUID
+    tree_id: UUID
+    name: str
+    gender: Optional[str] = None
 
 
+@dataclass(slots=True)
 class MockRelationship:
-    def __init__(self, id, tree_id, type, a_member_id, b_member_id):
-        self.id = id
-        self.tree_id = tree_id
-        self.type = type
-        self.a_member_id = a_member_id
-        self.b_member_id = b_member_id
+    id: UUID
+    tree_id: UUID
+    type: str
+    a_member_id: UUID
+    b_member_id: UUID
 
 
-def test_monogamy_violation_detection():
-    """Test detection of monogamy violations."""
-    from utils.tree_validation import _check_monogamy_violations
-    
-    # Setup: Member with multiple spouses
-    member1 = MockMember(uuid4(), uuid4(), "John Smith")
-    member2 = MockMember(uuid4(), member1.tree_id, "Wife 1")
-    member3 = MockMember(uuid4(), member1.tree_id, "Wife 2")
-    
-    members = [member1, member2, member3]
-    
-    relationships = [
-        MockRelationship(uuid4(), member1.tree_id, 'spouse', member1.id, member2.id),
-        MockRelationship(uuid4(), member1.tree_id, 'spouse', member1.id, member3.id),
-    ]
-    
-    violations = _check_monogamy_violations(members, relationships)
-    
-    assert len(violations) > 0
-    assert "John Smith" in violations
-    print(f"✓ Monogamy violations detected: {violations}")
+# One tree's rows; _stored inserts them and checks them through SQL
+@dataclass(slots=True)
+class MockTree:
+    id: UUID
+    members: List[MockMember]
+    relationships: List[MockRelationship]
 
 
-def test_same_sex_violation_detection():
-    """Test detection of same-sex union violations."""
-    from utils.tree_validation import _check_same_sex_violations
-    
-    # Setup: Same-sex couple
-    alice = MockMember(uuid4(), uuid4(), "Alice", gender="female")
-    amy = MockMember(uuid4(), alice.tree_id, "Amy", gender="female")
-    
-    members = [alice, amy]
-    
-    relationships = [
-        MockRelationship(uuid4(), alice.tree_id, 'spouse', alice.id, amy.id),
-    ]
-    
-    violations = _check_same_sex_violations(members, relationships)
-    
-    assert len(violations) > 0
-    assert "Alice & Amy" in violations[0]
-    print(f"✓ Same-sex violations detected: {violations}")
+@pytest.fixture
+def make_members():
+    """Factory for ``n`` unnamed members of one tree."""
+    def make(n, tree_id=None):
+        tree_id = tree_id or uuid4()
+        return [MockMember(uuid4(), tree_id, f"m{i}") for i in range(n)]
+    return make
 
 
-def test_single_parent_violation_detection():
-    """Test detection of single parent violations."""
-    from utils.tree_validation import _check_single_parent_violations
-    
-    # Setup: Child with one parent
-    parent = MockMember(uuid4(), uuid4(), "Single Parent")
-    child = MockMember(uuid4(), parent.tree_id, "Child")
-    
-    members = [parent, child]
-    
-    relationships = [
-        MockRelationship(uuid4(), parent.tree_id, 'parent-child', parent.id, child.id),
-    ]
-    
-    violations = _check_single_parent_violations(members, relationships)
-    
-    assert len(violations) > 0
-    assert "Child" in violations
-    print(f"✓ Single parent violations detected: {violations}")
+@pytest.fixture(scope="module")
+def sqlite_connection():
+    """A private in-memory SQLite database with the app's tables."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
 
 
-def test_multi_parent_violation_detection():
-    """Test detection of multi-parent violations."""
-    from utils.tree_validation import _check_multi_parent_violations
-    
-    # Setup: Child with 3 parents
+@contextmanager
+def _stored(connection, tree):
+    """Insert a tree's rows for the block and yield a TreeQueryContext over them."""
+    trans = connection.begin()
+    try:
+        if tree.members:
+            connection.execute(insert(models.Member), [asdict(m) for m in tree.members])
+        if tree.relationships:
+            connection.execute(insert(models.Relationship), [asdict(r) for r in tree.relationships])
+        yield TreeQueryContext(Session(bind=connection), tree.id)
+    finally:
+        trans.rollback()
+
+
+@st.composite
+def trees(draw, max_members=30):
+    """Random trees: members with optional genders and arbitrary edges between them."""
     tree_id = uuid4()
-    parent1 = MockMember(uuid4(), tree_id, "Parent 1")
-    parent2 = MockMember(uuid4(), tree_id, "Parent 2")
-    parent3 = MockMember(uuid4(), tree_id, "Parent 3")
-    child = MockMember(uuid4(), tree_id, "Child with 3 parents")
-    
-    members = [parent1, parent2, parent3, child]
-    
+    members = draw(st.lists(
+        st.builds(
+            MockMember,
+            id=st.uuids(),
+            tree_id=st.just(tree_id),
+            name=st.text(min_size=1, max_size=8),
+            gender=st.sampled_from(["male", "female", "Female", None])
+        ),
+        max_size=max_members,
+        unique_by=lambda m: m.id
+    ))
+    if not members:
+        return MockTree(tree_id, members, [])
+    
+    index = st.integers(0, len(members) - 1)
+    edges = draw(st.lists(st.tuples(st.sampled_from(['spouse', 'parent-child']), index, index)))
     relationships = [
-        MockRelationship(uuid4(), tree_id, 'parent-child', parent1.id, child.id),
-        MockRelationship(uuid4(), tree_id, 'parent-child', parent2.id, child.id),
-        MockRelationship(uuid4(), tree_id, 'parent-child', parent3.id, child.id),
+        MockRelationship(uuid4(), tree_id, type, members[a].id, members[b].id)
+        for type, a, b in edges
     ]
-    
-    violations = _check_multi_parent_violations(members, relationships)
-    
-    assert len(violations) > 0
-    assert "Child with 3 parents" in violations
-    print(f"✓ Multi-parent violations detected: {violations}")
+    return MockTree(tree_id, members, relationships)
 
 
-def test_max_spouses_violation_detection():
-    """Test detection of max spouses violations."""
-    from utils.tree_validation import _check_max_spouses_violations
-    
-    # Setup: Member with 4 spouses
+def _spouses(names, pairs, genders=None):
+    """Build a tree of members by name plus spouse relationships between name pairs."""
     tree_id = uuid4()
-    king = MockMember(uuid4(), tree_id, "King Henry")
-    spouse1 = MockMember(uuid4(), tree_id, "Spouse 1")
-    spouse2 = MockMember(uuid4(), tree_id, "Spouse 2")
-    spouse3 = MockMember(uuid4(), tree_id, "Spouse 3")
-    spouse4 = MockMember(uuid4(), tree_id, "Spouse 4")
-    
-    members = [king, spouse1, spouse2, spouse3, spouse4]
-    
+    genders = genders or {}
+    members = {name: MockMember(uuid4(), tree_id, name, genders.get(name)) for name in names}
     relationships = [
-        MockRelationship(uuid4(), tree_id, 'spouse', king.id, spouse1.id),
-        MockRelationship(uuid4(), tree_id, 'spouse', king.id, spouse2.id),
-        MockRelationship(uuid4(), tree_id, 'spouse', king.id, spouse3.id),
-        MockRelationship(uuid4(), tree_id, 'spouse', king.id, spouse4.id),
+        MockRelationship(uuid4(), tree_id, 'spouse', members[a].id, members[b].id)
+        for a, b in pairs
     ]
-    
-    max_spouses = 2
-    violations = _check_max_spouses_violations(members, relationships, max_spouses)
-    
-    assert len(violations) > 0
-    assert any(name == "King Henry" and count == 4 for name, count in violations)
-    print(f"✓ Max spouses violations detected: {violations}")
+    return MockTree(tree_id, list(members.values()), relationships)
 
 
-def test_max_parents_violation_detection():
-    """Test detection of max parents violations."""
-    from utils.tree_validation import _check_max_parents_violations
-    
-    # Setup: Child with 4 parents
+def _children(parent_names, child_name):
+    """Build a tree of one child with a parent-child relationship from each named parent."""
     tree_id = uuid4()
-    parents = [MockMember(uuid4(), tree_id, f"Parent {i}") for i in range(1, 5)]
-    child = MockMember(uuid4(), tree_id, "Shared custody child")
-    
-    members = parents + [child]
-    
+    parents = [MockMember(uuid4(), tree_id, name) for name in parent_names]
+    child = MockMember(uuid4(), tree_id, child_name)
     relationships = [
         MockRelationship(uuid4(), tree_id, 'parent-child', parent.id, child.id)
         for parent in parents
     ]
-    
-    max_parents = 2
-    violations = _check_max_parents_violations(members, relationships, max_parents)
-    
-    assert len(violations) > 0
-    assert any(name == "Shared custody child" and count == 4 for name, count in violations)
-    print(f"✓ Max parents violations detected: {violations}")
+    return MockTree(tree_id, parents + [child], relationships)
 
 
-def test_no_violations_on_empty_tree():
+@pytest.mark.parametrize(
+    "check, limit, tree, expected",
+    [
+        # Member with multiple spouses
+        (
+            _check_monogamy_violations, None,
+            _spouses(["John Smith", "Wife 1", "Wife 2"],
+                     [("John Smith", "Wife 1"), ("John Smith", "Wife 2")]),
+            "John Smith",
+        ),
+        # Same-sex couple
+        (
+            _check_same_sex_violations, None,
+            _spouses(["Alice", "Amy"], [("Alice", "Amy")],
+                     genders={"Alice": "female", "Amy": "female"}),
+            "Alice & Amy",
+        ),
+        # Child with one parent
+        (
+            _check_single_parent_violations, None,
+            _children(["Single Parent"], "Child"),
+            "Child",
+        ),
+        # Child with 3 parents
+        (
+            _check_multi_parent_violations, None,
+            _children(["Parent 1", "Parent 2", "Parent 3"], "Child with 3 parents"),
+            "Child with 3 parents",
+        ),
+        # Member with 4 spouses, limit 2
+        (
+            _check_max_spouses_violations, 2,
+            _spouses(["King Henry", "Spouse 1", "Spouse 2", "Spouse 3", "Spouse 4"],
+                     [("King Henry", f"Spouse {i}") for i in range(1, 5)]),
+            ("King Henry", 4),
+        ),
+        # Child with 4 parents, limit 2
+        (
+            _check_max_parents_violations, 2,
+            _children([f"Parent {i}" for i in range(1, 5)], "Shared custody child"),
+            ("Shared custody child", 4),
+        ),
+    ],
+    ids=["monogamy", "same-sex", "single-parent", "multi-parent", "max-spouses", "max-parents"]
+)
+def test_violation_detection(sqlite_connection, check, limit, tree, expected):
+    """Test each check reports the member that breaks its rule."""
+    with _stored(sqlite_connection, tree) as context:
+        if limit is None:
+            violations = set(check(context))
+            assert expected in violations
+        else:
+            # The limit checks report (name, count) pairs; look the name up
+            name, count = expected
+            violations = dict(check(context, limit))
+            assert violations.get(name) == count
+
+
+def test_no_violations_on_empty_tree(sqlite_connection):
     """Test that empty trees have no violations."""
-    from utils.tree_validation import (
-        _check_monogamy_violations,
-        _check_same_sex_violations,
-        _check_single_parent_violations,
-    )
-    
-    members = []
-    relationships = []
-    
-    assert len(_check_monogamy_violations(members, relationships)) == 0
-    assert len(_check_same_sex_violations(members, relationships)) == 0
-    assert len(_check_single_parent_violations(members, relationships)) == 0
-    
-    print("✓ Empty tree has no violations")
+    with _stored(sqlite_connection, MockTree(uuid4(), [], [])) as context:
+        assert len(_check_monogamy_violations(context)) == 0
+        assert len(_check_same_sex_violations(context)) == 0
+        assert len(_check_single_parent_violations(context)) == 0
 
 
-if __name__ == "__main__":
-    print("\n" + "="*60)
-    print("Tree Settings Validation Tests")
-    print("="*60 + "\n")
+@pytest.mark.parametrize("size", [10, 1000])
+def test_single_parent_lineage(sqlite_connection, make_members, size):
+    """Test a lineage where each member is the only parent of the next."""
+    members = make_members(size)
+    relationships = [
+        MockRelationship(uuid4(), parent.tree_id, 'parent-child', parent.id, child.id)
+        for parent, child in zip(members, members[1:])
+    ]
+    tree = MockTree(members[0].tree_id, members, relationships)
     
-    test_monogamy_violation_detection()
-    test_same_sex_violation_detection()
-    test_single_parent_violation_detection()
-    test_multi_parent_violation_detection()
-    test_max_spouses_violation_detection()
-    test_max_parents_violation_detection()
-    test_no_violations_on_empty_tree()
+    with _stored(sqlite_connection, tree) as context:
+        violations = _check_single_parent_violations(context)
+        
+        assert sorted(violations) == sorted(m.name for m in members[1:])
+        assert _check_multi_parent_violations(context) == []
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"monogamy": False, "allow_polygamy": True},
+        {"allow_multi_parent_children": True},
+        {"max_parents_per_child": 4},
+        {"max_spouses_per_member": None},
+    ],
+    ids=["allow-polygamy", "allow-multi-parent", "raise-max-parents", "unlimited-spouses"]
+)
+def test_loosening_change_skips_checks(change):
+    """Test a change that only loosens rules is accepted without reading the tree."""
+    current = TreeSettings(max_spouses_per_member=2)
+    new = current.model_copy(update=change)
+    
+    # A context that fails if any check reads it
+    is_valid, errors = validate_settings_change(None, uuid4(), current, new, context=object())
+    
+    assert is_valid is True
+    assert errors is None
+
+
+tree_settings = st.builds(
+    TreeSettings,
+    monogamy=st.booleans(),
+    allow_same_sex=st.booleans(),
+    allow_single_parent=st.booleans(),
+    allow_multi_parent_children=st.booleans(),
+    max_spouses_per_member=st.none() | st.integers(0, 3),
+    max_parents_per_child=st.none() | st.integers(0, 3)
+)
+
+
+@settings(max_examples=30, deadline=None)
+@given(tree=trees(), current=tree_settings, new=tree_settings)
+def test_analyze_matches_separate_calls(sqlite_connection, tree, current, new):
+    """Test the fused analysis gives the same answers as validating and reporting apart."""
+    with _stored(sqlite_connection, tree) as context:
+        # No context is passed, so each call queries on its own
+        session = context.db_session
+        is_valid, errors = validate_settings_change(session, tree.id, current, new)
+        impact = get_settings_change_impact(session, tree.id, current, new)
+        
+        assert analyze_settings_change(session, tree.id, current, new) == (is_valid, errors, impact)
+        assert analyze_settings_change(session, tree.id, current, new, impact_if_valid=False) == (
+            is_valid, errors, None if is_valid else impact
+        )
+
+
+@settings(max_examples=30, deadline=None)
+@given(tree=trees(), limit=st.integers(0, 3))
+def test_checks_match_degree_counts(sqlite_connection, tree, limit):
+    """Test the SQL aggregations against spouse and parent counts taken edge by edge."""
+    spouses = Counter()
+    parents = Counter()
+    for rel in tree.relationships:
+        if rel.type == 'spouse':
+            spouses[rel.a_member_id] += 1
+            spouses[rel.b_member_id] += 1
+        else:
+            parents[rel.b_member_id] += 1
+    
+    def names_where(counts, keep):
+        return sorted(m.name for m in tree.members if keep(counts[m.id]))
+    
+    def pairs_where(counts, keep):
+        return sorted((m.name, counts[m.id]) for m in tree.members if keep(counts[m.id]))
+    
+    names = {m.id: m.name for m in tree.members}
+    genders = {m.id: (m.gender or "").lower() for m in tree.members}
+    same_sex = sorted(
+        f"{names[rel.a_member_id]} & {names[rel.b_member_id]}"
+        for rel in tree.relationships
+        if rel.type == 'spouse' and genders[rel.a_member_id]
+        and genders[rel.a_member_id] == genders[rel.b_member_id]
+    )
     
-    print("\n" + "="*60)
-    print("✅ All tests passed!")
-    print("="*60 + "\n")
+    with _stored(sqlite_connection, tree) as context:
+        assert context.member_count == len(tree.members)
+        assert context.relationship_count == len(tree.relationships)
+        assert sorted(_check_monogamy_violations(context)) == names_where(spouses, lambda c: c > 1)
+        assert sorted(_check_single_parent_violations(context)) == names_where(parents, lambda c: c == 1)
+        assert sorted(_check_multi_parent_violations(context)) == names_where(parents, lambda c: c > 2)
+        assert sorted(_check_max_spouses_violations(context, limit)) == pairs_where(spouses, lambda c: c > limit)
+        assert sorted(_check_max_parents_violations(context, limit)) == pairs_where(parents, lambda c: c > limit)
+        assert sorted(_check_same_sex_violations(context)) == same_sex
+        
+        # The existence probes agree with the full lists (a fresh context,
+        # so they run their own queries instead of reusing those results)
+        probe = TreeQueryContext(context.db_session, tree.id)
+        assert probe.has_counted('spouse', operator.gt, limit) == bool(pairs_where(spouses, lambda c: c > limit))
+        assert probe.has_counted('parent-child', operator.eq, 1) == bool(names_where(parents, lambda c: c == 1))
+        assert probe.has_same_sex_pair() == bool(same_sex)
+        
+        # Listing after a probe (the impact after validation) gives the same
+        # answers, including when the probe found nothing and was memoized
+        assert sorted(_check_max_spouses_violations(probe, limit)) == pairs_where(spouses, lambda c: c > limit)
+        assert sorted(_check_single_parent_violations(probe)) == names_where(parents, lambda c: c == 1)
+        assert sorted(_check_same_sex_violations(probe)) == same_sex
@@ -1,19 +1,27 @@
 """
 Check database tables and schema after Alembic migrations.
+
+Row counts on Postgres are the planner's estimates from pg_class, read in
+one query; pass --exact to count every table (still in a single query).
 """
 
+import argparse
 import sys
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import MetaData, func, literal, select, text, union_all
+
+from utils.env import ensure_loaded
 
-load_dotenv()
+ensure_loaded()
 
-from utils.db import _select_engine_url
+from utils.db import get_engine
 
-# Get the database URL
-raw_url = os.environ.get('DATABASE_URL')
-engine_url = _select_engine_url(raw_url)
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--exact', action='store_true', help='Count rows exactly instead of using estimates')
+args = parser.parse_args()
+
+# The app's engine for DATABASE_URL; str() masks the password
+engine = get_engine()
+engine_url = str(engine.url)
 
 print("="*60)
 print("DATABASE SCHEMA CHECK")
@@ -21,16 +29,18 @@ print("="*60)
 print(f"\nConnecting to: {engine_url.split('@')[1] if '@' in engine_url else 'database'}")
 
 try:
-    engine = create_engine(engine_url)
-    inspector = inspect(engine)
-    
-    # Get all table names
-    tables = inspector.get_table_names()
+    # Reflect every table's columns, indexes and foreign keys up front, so
+    # the loop below reads Table objects instead of querying per table
+    metadata = MetaData()
+    metadata.reflect(bind=engine)
+    tables = sorted(metadata.tables)
+    # alembic's internal table is listed, but has no details or row count
+    data_tables = [table for table in tables if table != 'alembic_version']
     
     print(f"\n✓ Connected successfully")
     print(f"\nTotal tables: {len(tables)}")
     print("\nTables:")
-    for table in sorted(tables):
+    for table in tables:
         print(f"  • {table}")
     
     # Check each table's columns
@@ -38,31 +48,30 @@ try:
     print("TABLE DETAILS")
     print("="*60)
     
-    for table in sorted(tables):
-        if table == 'alembic_version':
-            continue  # Skip alembic's internal table
-        
-        columns = inspector.get_columns(table)
-        indexes = inspector.get_indexes(table)
-        foreign_keys = inspector.get_foreign_keys(table)
+    for table in data_tables:
+        reflected = metadata.tables[table]
+        columns = list(reflected.columns)
+        indexes = sorted(reflected.indexes, key=lambda idx: idx.name or '')
+        foreign_keys = sorted(reflected.foreign_key_constraints, key=lambda fk: fk.column_keys)
         
         print(f"\n📋 {table.upper()}")
         print(f"   Columns: {len(columns)}")
         for col in columns:
-            nullable = "NULL" if col['nullable'] else "NOT NULL"
-            pk = "PK" if col.get('primary_key') else ""
-            print(f"     - {col['name']}: {col['type']} {nullable} {pk}")
+            nullable = "NULL" if col.nullable else "NOT NULL"
+            pk = "PK" if col.primary_key else ""
+            print(f"     - {col.name}: {col.type} {nullable} {pk}")
         
         if indexes:
             print(f"   Indexes: {len(indexes)}")
             for idx in indexes:
-                unique = "UNIQUE" if idx.get('unique') else ""
-                print(f"     - {idx['name']} on {idx['column_names']} {unique}")
+                unique = "UNIQUE" if idx.unique else ""
+                print(f"     - {idx.name} on {[c.name for c in idx.columns]} {unique}")
         
         if foreign_keys:
             print(f"   Foreign Keys: {len(foreign_keys)}")
             for fk in foreign_keys:
-                print(f"     - {fk['constrained_columns']} -> {fk['referred_table']}.{fk['referred_columns']}")
+                referred_columns = [element.column.name for element in fk.elements]
+                print(f"     - {fk.column_keys} -> {fk.referred_table.name}.{referred_columns}")
     
     # Check row counts
     print("\n" + "="*60)
@@ -70,17 +79,41 @@ try:
     print("="*60)
     
     with engine.connect() as conn:
-        for table in sorted(tables):
-            if table == 'alembic_version':
-                # Check Alembic version
-                result = conn.execute(text(f"SELECT version_num FROM {table}"))
-                version = result.fetchone()
-                if version:
-                    print(f"  • {table}: {version[0]}")
+        if engine.dialect.name == 'postgresql' and not args.exact:
+            # Planner estimates for every table in one catalog lookup,
+            # instead of a full scan per table
+            result = conn.execute(text(
+                "SELECT c.relname, c.reltuples::bigint AS reltuples "
+                "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = current_schema() AND c.relkind = 'r'"
+            ))
+            counts = {row.relname: row.reltuples for row in result}
+            unit = "rows (estimate)"
+        elif data_tables:
+            # Exact counts, still in a single round trip; built from the
+            # reflected tables so names are bound and identifiers quoted
+            result = conn.execute(union_all(*(
+                select(literal(table).label('name'), func.count().label('n'))
+                .select_from(metadata.tables[table])
+                for table in data_tables
+            )))
+            counts = dict(result.all())
+            unit = "rows"
+        else:
+            counts, unit = {}, "rows"
+        
+        if 'alembic_version' in metadata.tables:
+            # Check Alembic version
+            version = conn.execute(text("SELECT version_num FROM alembic_version")).fetchone()
+            if version:
+                print(f"  • alembic_version: {version[0]}")
+        
+        for table in data_tables:
+            if counts.get(table, 0) < 0:
+                # Postgres reports -1 until the table has been analyzed
+                print(f"  • {table}: not analyzed yet (use --exact)")
             else:
-                result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                count = result.fetchone()[0]
-                print(f"  • {table}: {count} rows")
+                print(f"  • {table}: {counts.get(table, 0)} {unit}")
     
     print("\n" + "="*60)
     print("✓ DATABASE SCHEMA IS VALID")
@@ -16,11 +16,15 @@ from __future__ import annotations
 import os
 import sys
 import argparse
+import time
 import requests
 from datetime import datetime
+from zoneinfo import ZoneInfo
 import json
 from dotenv import load_dotenv
 
+from twilio_common import credential_error, session
+
 # Load env vars from .env for local development
 load_dotenv()
 
@@ -28,9 +32,9 @@ load_dotenv()
 def create_key(account_sid: str, auth_token: str, friendly_name: str = None):
 	url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Keys.json"
 	if not friendly_name:
-		friendly_name = f"cli-key-{int(datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')).timestamp())}"
+		friendly_name = f"cli-key-{int(time.time())}"
 	payload = {'FriendlyName': friendly_name}
-	resp = requests.post(url, auth=(account_sid, auth_token), data=payload)
+	resp = session.post(url, auth=(account_sid, auth_token), data=payload)
 	resp.raise_for_status()
 	return resp.json()
 
@@ -39,7 +43,7 @@ def write_env_lines(out_file: str, key_sid: str, key_secret: str):
 	line1 = f"TW_API_KEY_SID={key_sid}\n"
 	line2 = f"TW_API_KEY_SECRET={key_secret}\n"
 	with open(out_file, 'a', encoding='utf-8') as f:
-		f.write(f"# Added by create_twilio_api_key.py on {datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')).isoformat()}\n")
+		f.write(f"# Added by create_twilio_api_key.py on {datetime.now(ZoneInfo('Africa/Nairobi')).isoformat()}\n")
 		f.write(line1)
 		f.write(line2)
 
@@ -60,6 +64,11 @@ def main(argv=None):
 		parser.print_help()
 		sys.exit(2)
 
+	error = credential_error(account_sid, auth_token)
+	if error:
+		print(f'ERROR: {error}')
+		sys.exit(2)
+
 	try:
 		resp = create_key(account_sid, auth_token, args.friendly)
 	except requests.HTTPError as he:
@@ -10,14 +10,142 @@ This script generates comprehensive API documentation including:
 Run with: python generate_openapi_docs.py
 """
 
+import hashlib
 import json
 import yaml
-from typing import Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping
 from pathlib import Path
 
+try:
+    # libyaml's C emitter; much faster than the pure-Python one on a spec this size
+    from yaml import CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
 
-def generate_openapi_spec() -> Dict[str, Any]:
-    """Generate complete OpenAPI 3.0 specification."""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Files save_specs writes next to .spec.hash
+OUTPUT_FILES = ("openapi.json", "openapi.min.json", "openapi.yaml", "api-docs.html", "README.md")
+
+# Swagger UI page; static, so it is built once rather than on every save
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Family Tree API Documentation</title>
+    <meta charset="utf-8"/>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" type="text/css" href="https://unpkg.com/swagger-ui-dist@5/swagger-ui.css">
+</head>
+<body>
+<div id="swagger-ui"></div>
+<script src="https://unpkg.com/swagger-ui-dist@5/swagger-ui-bundle.js"></script>
+<script>
+window.onload = function() {
+    SwaggerUIBundle({
+        url: "openapi.min.json",
+        dom_id: '#swagger-ui',
+        deepLinking: true,
+        presets: [
+            SwaggerUIBundle.presets.apis,
+            SwaggerUIBundle.SwaggerUIStandalonePreset
+        ]
+    })
+}
+</script>
+</body>
+</html>"""
+
+README_TEMPLATE = """# Family Tree API Documentation
+
+## Viewing the Documentation
+
+### Online (Swagger UI)
+
+Open `api-docs.html` in your web browser to view interactive API documentation.
+
+### VS Code
+
+Install the "OpenAPI (Swagger) Editor" extension and open `openapi.yaml`.
+
+### Command Line
+
+```bash
+# View as JSON
+cat openapi.json | jq
+
+# View as YAML
+cat openapi.yaml
+```
+
+## Files
+
+- `openapi.json` - OpenAPI specification in JSON format
+- `openapi.min.json` - Compact JSON copy loaded by the Swagger UI page
+- `openapi.yaml` - OpenAPI specification in YAML format
+- `api-docs.html` - Interactive Swagger UI documentation
+- `postman_collection.json` - Postman collection for manual testing
+
+## Usage
+
+### Import into Postman
+
+1. Open Postman
+2. Click "Import"
+3. Select `postman_collection.json`
+4. Collection will appear in your sidebar
+
+### Generate Client SDKs
+
+Use OpenAPI Generator to create client libraries:
+
+```bash
+# Python client
+openapi-generator-cli generate -i openapi.yaml -g python -o ./client-python
+
+# TypeScript client
+openapi-generator-cli generate -i openapi.yaml -g typescript-fetch -o ./client-typescript
+
+# Java client
+openapi-generator-cli generate -i openapi.yaml -g java -o ./client-java
+```
+
+## Authentication
+
+All protected endpoints require Bearer authentication:
+
+```
+Authorization: Bearer YOUR_JWT_TOKEN
+```
+
+Get a token:
+1. Request OTP: `POST /api/auth/otp/request`
+2. Verify OTP: `POST /api/auth/otp/verify`
+3. Use returned `access_token`
+
+## Base URLs
+
+- Development: http://localhost:8050
+- Production: https://api.yourfamilytree.com
+
+## Support
+
+For API support, contact: support@yourfamilytree.com
+"""
+
+
+@lru_cache(maxsize=1)
+def generate_openapi_spec() -> Mapping[str, Any]:
+    """Generate complete OpenAPI 3.0 specification.
+    
+    The spec is built once and cached. It is returned as a read-only
+    mapping, but that only covers the top-level keys: the nested dicts
+    are shared with every caller and must not be modified.
+    """
     
     spec = {
         "openapi": "3.0.0",
@@ -177,138 +305,110 @@ Production: `https://api.yourfamilytree.com`
         }
     }
     
-    return spec
+    return MappingProxyType(spec)
 
 
-def save_specs(spec: Dict[str, Any], output_dir: Path):
-    """Save OpenAPI spec in both JSON and YAML formats."""
+def dump_json(obj: Mapping[str, Any], path: Path, indent: bool = True) -> None:
+    """Write JSON as UTF-8, through orjson when it is installed.
+    
+    Both paths produce the same bytes: two-space indent (or compact),
+    keys in insertion order and non-ASCII characters left unescaped.
+    
+    Args:
+        obj: Object to serialize
+        path: File to write
+        indent: Indent by two spaces; compact output when False
+    """
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0))
+    elif indent:
+        path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding='utf-8')
+    else:
+        path.write_text(json.dumps(obj, separators=(",", ":"), ensure_ascii=False), encoding='utf-8')
+
+
+def spec_digest(spec: Mapping[str, Any]) -> str:
+    """Hash the spec together with the static pages written alongside it.
+    
+    Args:
+        spec: OpenAPI specification
+        
+    Returns:
+        Hex digest that changes whenever any generated file would change
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(dict(spec), sort_keys=True).encode())
+    digest.update(HTML_TEMPLATE.encode())
+    digest.update(README_TEMPLATE.encode())
+    return digest.hexdigest()
+
+
+def outputs_current(output_dir: Path, digest: str) -> bool:
+    """Whether the previous run's files are all still there and untouched.
+    
+    Args:
+        output_dir: Directory the docs are written to
+        digest: Digest of the spec about to be written
+        
+    Returns:
+        True if the recorded digest matches and no output file is missing
+        or was modified after the digest was recorded
+    """
+    hash_path = output_dir / ".spec.hash"
+    if not hash_path.exists() or hash_path.read_text().strip() != digest:
+        return False
+    recorded = hash_path.stat().st_mtime
+    for name in OUTPUT_FILES:
+        path = output_dir / name
+        if not path.exists() or path.stat().st_mtime > recorded:
+            return False
+    return True
+
+
+def save_specs(spec: Mapping[str, Any], output_dir: Path):
+    """Save OpenAPI spec in both JSON and YAML formats.
+    
+    Nothing is rewritten when the spec digest matches the one recorded
+    by the previous run and all of that run's files are still in place.
+    """
+    hash_path = output_dir / ".spec.hash"
+    digest = spec_digest(spec)
+    if outputs_current(output_dir, digest):
+        print(f"⏭️  Spec unchanged, skipping: {output_dir}")
+        return
+    
+    # json and yaml only serialize real dicts; a shallow copy is enough
+    spec = dict(spec)
     
     # Save as JSON
     json_path = output_dir / "openapi.json"
-    with open(json_path, 'w') as f:
-        json.dump(spec, f, indent=2)
+    dump_json(spec, json_path)
     print(f"✅ Generated: {json_path}")
     
+    # Compact JSON for Swagger UI to fetch and parse
+    min_json_path = output_dir / "openapi.min.json"
+    dump_json(spec, min_json_path, indent=False)
+    print(f"✅ Generated: {min_json_path}")
+    
     # Save as YAML
     yaml_path = output_dir / "openapi.yaml"
     with open(yaml_path, 'w') as f:
-        yaml.dump(spec, f, default_flow_style=False, sort_keys=False)
+        yaml.dump(spec, f, Dumper=YamlDumper, default_flow_style=False, sort_keys=False)
     print(f"✅ Generated: {yaml_path}")
     
     # Generate HTML documentation page
     html_path = output_dir / "api-docs.html"
-    html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>Family Tree API Documentation</title>
-    <meta charset="utf-8"/>
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="stylesheet" type="text/css" href="https://unpkg.com/swagger-ui-dist@5/swagger-ui.css">
-</head>
-<body>
-<div id="swagger-ui"></div>
-<script src="https://unpkg.com/swagger-ui-dist@5/swagger-ui-bundle.js"></script>
-<script>
-window.onload = function() {{
-    SwaggerUIBundle({{
-        url: "openapi.json",
-        dom_id: '#swagger-ui',
-        deepLinking: true,
-        presets: [
-            SwaggerUIBundle.presets.apis,
-            SwaggerUIBundle.SwaggerUIStandalonePreset
-        ]
-    }})
-}}
-</script>
-</body>
-</html>"""
-    
     with open(html_path, 'w') as f:
-        f.write(html_content)
+        f.write(HTML_TEMPLATE)
     print(f"✅ Generated: {html_path}")
     
     # Generate README
     readme_path = output_dir / "README.md"
-    readme_content = """# Family Tree API Documentation
-
-## Viewing the Documentation
-
-### Online (Swagger UI)
-
-Open `api-docs.html` in your web browser to view interactive API documentation.
-
-### VS Code
-
-Install the "OpenAPI (Swagger) Editor" extension and open `openapi.yaml`.
-
-### Command Line
-
-```bash
-# View as JSON
-cat openapi.json | jq
-
-# View as YAML
-cat openapi.yaml
-```
-
-## Files
-
-- `openapi.json` - OpenAPI specification in JSON format
-- `openapi.yaml` - OpenAPI specification in YAML format
-- `api-docs.html` - Interactive Swagger UI documentation
-- `postman_collection.json` - Postman collection for manual testing
-
-## Usage
-
-### Import into Postman
-
-1. Open Postman
-2. Click "Import"
-3. Select `postman_collection.json`
-4. Collection will appear in your sidebar
-
-### Generate Client SDKs
-
-Use OpenAPI Generator to create client libraries:
-
-```bash
-# Python client
-openapi-generator-cli generate -i openapi.yaml -g python -o ./client-python
-
-# TypeScript client
-openapi-generator-cli generate -i openapi.yaml -g typescript-fetch -o ./client-typescript
-
-# Java client
-openapi-generator-cli generate -i openapi.yaml -g java -o ./client-java
-```
-
-## Authentication
-
-All protected endpoints require Bearer authentication:
-
-```
-Authorization: Bearer YOUR_JWT_TOKEN
-```
-
-Get a token:
-1. Request OTP: `POST /api/auth/otp/request`
-2. Verify OTP: `POST /api/auth/otp/verify`
-3. Use returned `access_token`
-
-## Base URLs
-
-- Development: http://localhost:8050
-- Production: https://api.yourfamilytree.com
-
-## Support
-
-For API support, contact: support@yourfamilytree.com
-"""
-    
     with open(readme_path, 'w') as f:
-        f.write(readme_content)
+        f.write(README_TEMPLATE)
     print(f"✅ Generated: {readme_path}")
+    
+    hash_path.write_text(digest + "\n")
 
 
 def main():
@@ -7,16 +7,17 @@ Usage:
 import os
 import sys
 import argparse
-import requests
 import json
 from dotenv import load_dotenv
 
+from twilio_common import credential_error, session
+
 load_dotenv()
 
 
 def list_keys(account_sid: str, auth_token: str):
     url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Keys.json"
-    resp = requests.get(url, auth=(account_sid, auth_token))
+    resp = session.get(url, auth=(account_sid, auth_token))
     resp.raise_for_status()
     return resp.json()
 
@@ -33,6 +34,11 @@ def main(argv=None):
         print('TW_ACCOUNT_SID and TW_AUTH_TOKEN required')
         sys.exit(2)
 
+    error = credential_error(account_sid, auth_token)
+    if error:
+        print(error)
+        sys.exit(2)
+
     resp = list_keys(account_sid, auth_token)
     print(json.dumps(resp, indent=2))
 
@@ -1,18 +1,35 @@
 """Reset alembic_version table and apply migrations fresh."""
 
-from sqlalchemy import create_engine, text
-from utils.db import _select_engine_url
-import os
-from dotenv import load_dotenv
+from pathlib import Path
 
-load_dotenv()
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
 
-engine = create_engine(_select_engine_url(os.environ.get('DATABASE_URL')))
+from utils.env import ensure_loaded
 
-print("Resetting alembic_version table...")
-with engine.connect() as conn:
+ensure_loaded()
+
+from utils.db import get_engine
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+engine = get_engine()
+
+alembic_cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+alembic_cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+
+with engine.begin() as conn:
+    print("Resetting alembic_version table...")
     conn.execute(text('DELETE FROM alembic_version'))
-    conn.commit()
-    print('✓ Reset alembic_version table')
+print('✓ Reset alembic_version table')
 
-print("\nNow run: alembic upgrade head")
+# Upgrade in-process (migrations/env.py picks the connection up), rather
+# than leaving `alembic upgrade head` to a new process. The connection is
+# handed over outside a transaction so alembic manages its own, which the
+# autocommit blocks in some migrations need.
+print("\nApplying migrations (alembic upgrade head)...")
+with engine.connect() as conn:
+    alembic_cfg.attributes['connection'] = conn
+    command.upgrade(alembic_cfg, "head")
+print('✓ Database upgraded to head')
@@ -3,19 +3,24 @@
 
 Usage:
   TW_ACCOUNT_SID=AC... TW_AUTH_TOKEN=... python revoke_twilio_api_key.py --key-sid SKxxxx
+
+Pass --key-sid more than once to revoke several keys over one connection.
 """
+from __future__ import annotations
 import os
 import sys
 import argparse
 import requests
 from dotenv import load_dotenv
 
+from twilio_common import KEY_SID_RE, credential_error, session as _session
+
 load_dotenv()
 
 
-def revoke_key(account_sid: str, auth_token: str, key_sid: str):
+def revoke_key(account_sid: str, auth_token: str, key_sid: str, session: requests.Session | None = None):
     url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Keys/{key_sid}.json"
-    resp = requests.delete(url, auth=(account_sid, auth_token))
+    resp = (session or _session).delete(url, auth=(account_sid, auth_token))
     if resp.status_code in (200, 204):
         return True
     resp.raise_for_status()
@@ -25,7 +30,7 @@ def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--account-sid')
     parser.add_argument('--auth-token')
-    parser.add_argument('--key-sid', required=True)
+    parser.add_argument('--key-sid', required=True, action='append', help='Key SID to revoke (repeatable)')
     args = parser.parse_args(argv)
 
     account_sid = args.account_sid or os.environ.get('TW_ACCOUNT_SID')
@@ -34,8 +39,22 @@ def main(argv=None):
         print('TW_ACCOUNT_SID and TW_AUTH_TOKEN required')
         sys.exit(2)
 
-    success = revoke_key(account_sid, auth_token, args.key_sid)
-    print('revoked' if success else 'failed')
+    error = credential_error(account_sid, auth_token)
+    if error:
+        print(error)
+        sys.exit(2)
+    for key_sid in args.key_sid:
+        if not KEY_SID_RE.match(key_sid):
+            print(f'Key SID must be SK followed by 32 hex characters: {key_sid}')
+            sys.exit(2)
+
+    # Every key goes over the same session, and so the same TLS connection
+    for key_sid in args.key_sid:
+        success = revoke_key(account_sid, auth_token, key_sid, _session)
+        if len(args.key_sid) > 1:
+            print(f"{key_sid}: {'revoked' if success else 'failed'}")
+        else:
+            print('revoked' if success else 'failed')
 
 
 if __name__ == '__main__':
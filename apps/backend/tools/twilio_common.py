@@ -0,0 +1,36 @@
+"""Shared HTTP session and credential checks for the Twilio key tools.
+
+Imported by create_twilio_api_key.py, list_twilio_api_keys.py and
+revoke_twilio_api_key.py, which are run as scripts from this directory.
+"""
+from __future__ import annotations
+import re
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Twilio credential shapes, checked before any request is sent
+ACCOUNT_SID_RE = re.compile(r'^AC[0-9a-fA-F]{32}$')
+AUTH_TOKEN_RE = re.compile(r'^[0-9a-fA-F]{32}$')
+KEY_SID_RE = re.compile(r'^SK[0-9a-fA-F]{32}$')
+
+# One pooled session per process, so repeated calls reuse the TLS connection.
+# Transient Twilio errors are retried with backoff; urllib3 only retries
+# idempotent methods on these statuses, so a key is never created twice
+session = requests.Session()
+session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+))
+
+
+def credential_error(account_sid: str, auth_token: str) -> Optional[str]:
+    """Describe what is wrong with an Account SID / Auth Token pair, if anything."""
+    if not ACCOUNT_SID_RE.match(account_sid):
+        return 'Account SID must be AC followed by 32 hex characters'
+    if not AUTH_TOKEN_RE.match(auth_token):
+        return 'Auth Token must be 32 hex characters'
+    return None
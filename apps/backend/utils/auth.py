@@ -1,19 +1,32 @@
 """JWT token generation and verification utilities."""
 
-import os
 import jwt
-from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional, Dict, Any, Tuple
 from uuid import UUID
 import logging
-import pytz
+from utils.config import get_settings
 
 logger = logging.getLogger(__name__)
 
-# Configuration
-SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES', '43200'))  # 30 days default
+# Configuration, parsed once (see utils/config.py)
+settings = get_settings()
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.jwt_algorithm
+_ACCESS_TOKEN_EXPIRE_SECONDS = int(settings.access_token_expire.total_seconds())
+ACCESS_TOKEN_EXPIRE_MINUTES = _ACCESS_TOKEN_EXPIRE_SECONDS // 60
+
+# Verified-token cache: blake2b(token) -> (payload, cache expiry as epoch
+# seconds), so raw tokens are never kept. Only successful verifications are
+# cached, so a flood of junk tokens can't push real sessions out.
+_JWT_CACHE: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_JWT_CACHE_MAX = 10_000
+_JWT_CACHE_TTL_SECONDS = 5
+_jwt_cache_lock = threading.Lock()
 
 
 def create_access_token(user_id: UUID, email: str, expires_delta: Optional[timedelta] = None) -> str:
@@ -27,19 +40,20 @@ def create_access_token(user_id: UUID, email: str, expires_delta: Optional[timed
     Returns:
         Encoded JWT token string
     """
+    # JWT iat/exp are plain epoch seconds, so skip building datetimes
+    iat = int(time.time())
+    if expires_delta:
+        exp = iat + int(expires_delta.total_seconds())
+    else:
+        exp = iat + _ACCESS_TOKEN_EXPIRE_SECONDS
+    
     to_encode: Dict[str, Any] = {
         "sub": str(user_id),  # Subject (user ID)
         "email": email,
-        "iat": datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')),  # Issued at
+        "iat": iat,  # Issued at
+        "exp": exp,
     }
     
-    if expires_delta:
-        expire = datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode["exp"] = expire
-    
     try:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
@@ -48,6 +62,19 @@ def create_access_token(user_id: UUID, email: str, expires_delta: Optional[timed
         raise
 
 
+def _token_cache_key(token: str) -> bytes:
+    """Digest a token for use as a cache key."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _cache_verification(cache_key: bytes, payload: Dict[str, Any], expires: float) -> None:
+    """Store a verification result, evicting the least recently used entry."""
+    with _jwt_cache_lock:
+        _JWT_CACHE[cache_key] = (payload, expires)
+        if len(_JWT_CACHE) > _JWT_CACHE_MAX:
+            _JWT_CACHE.popitem(last=False)
+
+
 def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
     """Verify and decode a JWT access token.
     
@@ -56,15 +83,37 @@ def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
         
     Returns:
         Dictionary containing token payload if valid, None if invalid
+        
+    Note:
+        Successful results are cached for a few seconds (never past the
+        token's own ``exp``), so the returned dict may be shared between
+        callers and must not be mutated.
     """
+    cache_key = _token_cache_key(token)
+    now_ts = time.time()
+    with _jwt_cache_lock:
+        cached = _JWT_CACHE.get(cache_key)
+        if cached is not None:
+            if cached[1] > now_ts:
+                _JWT_CACHE.move_to_end(cache_key)
+                return cached[0]
+            del _JWT_CACHE[cache_key]
+    
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # exp is required: every token we issue carries one, and a token
+        # without it would never expire
+        payload = jwt.decode(
+            token,
+            SECRET_KEY,
+            algorithms=[ALGORITHM],
+            options={"require": ["exp"]}
+        )
         
-        # Check expiration
         exp = payload.get("exp")
-        if exp and datetime.fromtimestamp(exp, tz=pytz.timezone('Africa/Nairobi')) < datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi')):
-            logger.warning("Token has expired")
-            return None
+        cache_expires = now_ts + _JWT_CACHE_TTL_SECONDS
+        if exp:
+            cache_expires = min(cache_expires, exp)
+        _cache_verification(cache_key, payload, cache_expires)
             
         return payload
     except jwt.ExpiredSignatureError:
@@ -78,6 +127,25 @@ def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def invalidate_token(token: str) -> None:
+    """Drop one token's cached verification (e.g. on logout).
+    
+    This does not revoke the token: it still verifies until its ``exp``,
+    and the next verification simply caches it again.
+    
+    Args:
+        token: The JWT token string
+    """
+    with _jwt_cache_lock:
+        _JWT_CACHE.pop(_token_cache_key(token), None)
+
+
+def clear_token_cache() -> None:
+    """Drop all cached token verifications (e.g. after rotating SECRET_KEY)."""
+    with _jwt_cache_lock:
+        _JWT_CACHE.clear()
+
+
 def decode_token_payload(token: str) -> Optional[Dict[str, Any]]:
     """Decode token payload without verification (for debugging only).
     
@@ -0,0 +1,39 @@
+"""Typed application settings, read from the environment once."""
+
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+
+from utils.env import ensure_loaded
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Auth settings, parsed and pre-computed at startup.
+
+    Attributes:
+        secret_key: JWT signing key, for PyJWT
+        jwt_algorithm: Signing algorithm for access tokens
+        access_token_expire: Default access token lifetime
+    """
+    secret_key: str
+    jwt_algorithm: str
+    access_token_expire: timedelta
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings from the environment on first use.
+
+    Returns:
+        The process-wide Settings instance
+    """
+    ensure_loaded()
+    secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+    expire_minutes = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES') or '43200')  # 30 days default
+    return Settings(
+        secret_key=secret_key,
+        jwt_algorithm="HS256",
+        access_token_expire=timedelta(minutes=expire_minutes),
+    )
@@ -1,10 +1,14 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 import logging
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from utils.env import ensure_loaded
 
-load_dotenv()
+ensure_loaded()
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +17,7 @@ raw_database_url = os.environ.get(
     'DATABASE_URL', None
 )
 
+@lru_cache(maxsize=4)
 def _select_engine_url(raw_url: str) -> str:
     """Return a SQLAlchemy-compatible URL, trying to prefer psycopg (psycopg3) if available.
 
@@ -54,8 +59,62 @@ def _select_engine_url(raw_url: str) -> str:
 
 DATABASE_URL = _select_engine_url(raw_database_url)
 
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Return create_engine() pool options suited to the database URL.
+    
+    Server databases get a LIFO queue pool sized from the DB_POOL_* env
+    vars, so idle overflow connections age out instead of being cycled.
+    A private in-memory SQLite database only exists on its connection, so
+    it is pinned to a single shared one; file SQLite keeps the defaults.
+    
+    Args:
+        url: SQLAlchemy database URL
+        
+    Returns:
+        Keyword arguments for create_engine()
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite':
+        if parsed.database in (None, '', ':memory:'):
+            return {
+                'poolclass': StaticPool,
+                'connect_args': {'check_same_thread': False},
+            }
+        return {}
+    
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or '20'),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or '30'),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or '30'),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or '1800'),
+        'pool_pre_ping': True,
+        'pool_use_lifo': True,
+    }
+
+
 # Create engine and sessionmaker
-engine = create_engine(DATABASE_URL, future=True)
+engine = create_engine(DATABASE_URL, future=True, **_engine_options(DATABASE_URL))
+
+
+@lru_cache(maxsize=4)
+def get_engine(url: Optional[str] = None) -> Engine:
+    """Return a shared engine, creating at most one per database URL.
+    
+    Scripts and tools should use this instead of calling create_engine()
+    themselves, so importing several of them doesn't build a pool each.
+    
+    Args:
+        url: Raw database URL; defaults to DATABASE_URL from the environment
+        
+    Returns:
+        The app's engine for the default URL, otherwise a cached engine
+    """
+    if url is None or _select_engine_url(url) == DATABASE_URL:
+        return engine
+    selected_url = _select_engine_url(url)
+    return create_engine(selected_url, future=True, **_engine_options(selected_url))
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
@@ -1,13 +1,14 @@
 """FastAPI dependencies for authentication and authorization."""
 
-from typing import Optional, Callable, Literal
+from typing import Optional, Callable, Literal, Tuple
 from functools import wraps
-from fastapi import Depends, HTTPException, status, Cookie, Header
+from fastapi import Depends, HTTPException, Request, status, Cookie, Header
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from uuid import UUID
 import models
 from utils import db, auth as auth_utils
-from utils.permissions import require_membership as _require_membership
+from utils.permissions import membership_memo, require_membership as _require_membership
 
 # Cookie name for JWT token
 SESSION_COOKIE_NAME = "family_tree_session"
@@ -16,12 +17,11 @@ SESSION_COOKIE_NAME = "family_tree_session"
 RoleType = Literal["custodian", "contributor", "viewer"]
 
 
-async def get_current_user(
-    session_token: Optional[str] = Cookie(None, alias=SESSION_COOKIE_NAME),
-    authorization: Optional[str] = Header(None),
-    db_session: Session = Depends(db.get_db)
-) -> models.User:
-    """Dependency to get the current authenticated user.
+def _authenticated_user_id(
+    session_token: Optional[str],
+    authorization: Optional[str]
+) -> UUID:
+    """Return the user ID from the request's JWT.
     
     Checks for JWT token in:
     1. HttpOnly session cookie
@@ -30,10 +30,9 @@ async def get_current_user(
     Args:
         session_token: JWT token from cookie
         authorization: Authorization header value
-        db_session: Database session
         
     Returns:
-        User model instance
+        The token's subject as a UUID
         
     Raises:
         HTTPException: 401 if not authenticated or token invalid
@@ -44,15 +43,13 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Try to get token from cookie or Authorization header
-    token = None
-    if session_token:
-        token = session_token
-    elif authorization:
-        # Extract Bearer token
-        parts = authorization.split()
-        if len(parts) == 2 and parts[0].lower() == "bearer":
-            token = parts[1]
+    # Try to get token from cookie or Authorization header; the Bearer
+    # scheme is matched by prefix so the header isn't split into a list
+    token = session_token or (
+        authorization[7:].strip()
+        if authorization and authorization[:7].lower() == "bearer "
+        else None
+    )
     
     if not token:
         raise credentials_exception
@@ -67,18 +64,94 @@ async def get_current_user(
         raise credentials_exception
     
     try:
-        user_id = UUID(user_id_str)
+        return UUID(user_id_str)
     except ValueError:
         raise credentials_exception
+
+
+async def get_current_user(
+    session_token: Optional[str] = Cookie(None, alias=SESSION_COOKIE_NAME),
+    authorization: Optional[str] = Header(None),
+    db_session: Session = Depends(db.get_db)
+) -> models.User:
+    """Dependency to get the current authenticated user.
+    
+    Checks for JWT token in:
+    1. HttpOnly session cookie
+    2. Authorization header (Bearer token)
+    
+    Args:
+        session_token: JWT token from cookie
+        authorization: Authorization header value
+        db_session: Database session
+        
+    Returns:
+        User model instance
+        
+    Raises:
+        HTTPException: 401 if not authenticated or token invalid
+    """
+    user_id = _authenticated_user_id(session_token, authorization)
     
     # Get user from database
     user = db_session.query(models.User).filter(models.User.id == user_id).first()
     if not user:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
 
+async def get_current_user_with_membership(
+    tree_id: UUID,
+    request: Request,
+    session_token: Optional[str] = Cookie(None, alias=SESSION_COOKIE_NAME),
+    authorization: Optional[str] = Header(None),
+    db_session: Session = Depends(db.get_db)
+) -> Tuple[models.User, Optional[models.Membership]]:
+    """Dependency to get the current user and their membership in the path's tree.
+    
+    Loads both in one query (the membership is outer-joined) and memoizes
+    the membership on the request, so permission checks later in the same
+    request don't query it again.
+    
+    Args:
+        tree_id: Tree ID from the path
+        request: Current request
+        session_token: JWT token from cookie
+        authorization: Authorization header value
+        db_session: Database session
+        
+    Returns:
+        Tuple of (user, membership or None if not a member)
+        
+    Raises:
+        HTTPException: 401 if not authenticated or token invalid
+    """
+    user_id = _authenticated_user_id(session_token, authorization)
+    
+    row = db_session.query(models.User, models.Membership).outerjoin(
+        models.Membership,
+        and_(
+            models.Membership.user_id == models.User.id,
+            models.Membership.tree_id == tree_id
+        )
+    ).filter(models.User.id == user_id).first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user, membership = row
+    membership_memo(request)[(user.id, tree_id)] = membership
+    return user, membership
+
+
 async def get_current_user_optional(
     session_token: Optional[str] = Cookie(None, alias=SESSION_COOKIE_NAME),
     authorization: Optional[str] = Header(None),
@@ -96,6 +169,10 @@ async def get_current_user_optional(
     Returns:
         User model instance or None if not authenticated
     """
+    # Anonymous request: nothing to verify or look up
+    if not session_token and not authorization:
+        return None
+    
     try:
         return await get_current_user(session_token, authorization, db_session)
     except HTTPException:
@@ -115,6 +192,7 @@ def require_role(tree_id: UUID, required_role: str):
         Dependency function
     """
     async def check_role(
+        request: Request,
         current_user: models.User = Depends(get_current_user),
         db_session: Session = Depends(db.get_db)
     ):
@@ -123,7 +201,8 @@ def require_role(tree_id: UUID, required_role: str):
             current_user.id,
             tree_id,
             db_session,
-            required_role
+            required_role,
+            request
         )
         
         return current_user
@@ -154,15 +233,23 @@ def require_tree_role(required_role: RoleType):
     """
     async def validate_role(
         tree_id: UUID,
-        current_user: models.User = Depends(get_current_user),
+        request: Request,
+        user_and_membership: Tuple[models.User, Optional[models.Membership]] = Depends(
+            get_current_user_with_membership
+        ),
         db_session: Session = Depends(db.get_db)
     ):
-        # Use the centralized permission checking utility
+        current_user, _ = user_and_membership
+        
+        # Use the centralized permission checking utility; it finds the
+        # membership already memoized on the request, so only a missing
+        # membership costs another query (to tell 404 from 403)
         _require_membership(
             current_user.id,
             tree_id,
             db_session,
-            required_role
+            required_role,
+            request
         )
         
         return current_user
@@ -0,0 +1,22 @@
+"""Process-wide .env loading.
+
+Modules that need environment variables call ensure_loaded() instead of
+load_dotenv() directly, so the .env file is read and parsed once per
+process no matter how many of them are imported.
+"""
+
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=1)
+def ensure_loaded() -> bool:
+    """Load .env into os.environ on the first call; later calls are no-ops.
+
+    Variables already set in the environment are not overridden.
+
+    Returns:
+        True if a .env file was found and loaded
+    """
+    return load_dotenv()
@@ -139,6 +139,9 @@ GENDER_OPTIONS: List[GenderOption] = [
     },
 ]
 
+# Options keyed by value, for the lookup helpers below
+_GENDER_BY_VALUE = {option["value"]: option for option in GENDER_OPTIONS}
+
 # Common pronoun options
 PRONOUN_OPTIONS: List[str] = [
     "she/her",
@@ -194,10 +197,8 @@ def get_gender_color(gender_value: str) -> str:
     Returns:
         Tailwind color class (e.g., 'pink', 'blue', 'purple')
     """
-    for option in GENDER_OPTIONS:
-        if option["value"] == gender_value:
-            return option["color"]
-    return "gray"  # Default fallback
+    option = _GENDER_BY_VALUE.get(gender_value)
+    return option["color"] if option else "gray"  # Default fallback
 
 
 # Helper function to get gender label
@@ -211,7 +212,5 @@ def get_gender_label(gender_value: str) -> str:
     Returns:
         Display label for the gender
     """
-    for option in GENDER_OPTIONS:
-        if option["value"] == gender_value:
-            return option["label"]
-    return gender_value.title()  # Fallback to capitalized value
+    option = _GENDER_BY_VALUE.get(gender_value)
+    return option["label"] if option else gender_value.title()  # Fallback to capitalized value
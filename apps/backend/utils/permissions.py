@@ -2,8 +2,9 @@
 
 from typing import Optional, Literal
 from uuid import UUID
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 import logging
 
 import models
@@ -13,34 +14,58 @@ logger = logging.getLogger(__name__)
 # Role types
 RoleType = Literal["custodian", "contributor", "viewer"]
 
-# Role hierarchy for comparison
-ROLE_HIERARCHY = {
-    "custodian": 3,
-    "contributor": 2,
-    "viewer": 1
-}
+# Role hierarchy for comparison (highest first); values are models.RoleLevel
+ROLE_HIERARCHY = {level.name: level for level in reversed(models.RoleLevel)}
+
+
+def membership_memo(request: Request) -> dict:
+    """Return the request's memo of (user_id, tree_id) -> membership or None.
+    
+    Args:
+        request: Current request
+        
+    Returns:
+        The dict stored on ``request.state``, created on first use
+    """
+    memo = getattr(request.state, "memberships", None)
+    if memo is None:
+        memo = request.state.memberships = {}
+    return memo
 
 
 def get_membership(
     user_id: UUID,
     tree_id: UUID,
-    db_session: Session
+    db_session: Session,
+    request: Optional[Request] = None
 ) -> Optional[models.Membership]:
     """Get a user's membership in a tree.
     
+    When a request is given, the result (including "not a member") is
+    remembered on ``request.state`` for the rest of that request, so
+    stacked permission checks don't repeat the query.
+    
     Args:
         user_id: User ID to check
         tree_id: Tree ID to check
         db_session: Database session
+        request: Optional current request to memoize the lookup on
         
     Returns:
         Membership object if found, None otherwise
     """
+    memo = membership_memo(request) if request is not None else None
+    if memo is not None and (user_id, tree_id) in memo:
+        return memo[(user_id, tree_id)]
+    
     membership = db_session.query(models.Membership).filter(
         models.Membership.user_id == user_id,
         models.Membership.tree_id == tree_id
     ).first()
     
+    if memo is not None:
+        memo[(user_id, tree_id)] = membership
+    
     return membership
 
 
@@ -48,7 +73,8 @@ def has_role(
     user_id: UUID,
     tree_id: UUID,
     required_role: RoleType,
-    db_session: Session
+    db_session: Session,
+    request: Optional[Request] = None
 ) -> bool:
     """Check if a user has at least the required role in a tree.
     
@@ -59,6 +85,7 @@ def has_role(
         tree_id: Tree ID to check
         required_role: Minimum role required ('custodian', 'contributor', 'viewer')
         db_session: Database session
+        request: Optional current request to memoize the lookup on
         
     Returns:
         True if user has sufficient role, False otherwise
@@ -67,21 +94,19 @@ def has_role(
         >>> has_role(user_id, tree_id, "contributor", db)
         True  # User is a custodian (which is >= contributor)
     """
-    membership = get_membership(user_id, tree_id, db_session)
+    membership = get_membership(user_id, tree_id, db_session, request)
     
     if not membership:
         return False
     
-    user_role_level = ROLE_HIERARCHY.get(membership.role, 0)
-    required_role_level = ROLE_HIERARCHY.get(required_role, 999)
-    
-    return user_role_level >= required_role_level
+    return membership.role_level >= ROLE_HIERARCHY.get(required_role, 999)
 
 
 def is_custodian(
     user_id: UUID,
     tree_id: UUID,
-    db_session: Session
+    db_session: Session,
+    request: Optional[Request] = None
 ) -> bool:
     """Check if a user is a custodian of a tree.
     
@@ -89,6 +114,7 @@ def is_custodian(
         user_id: User ID to check
         tree_id: Tree ID to check
         db_session: Database session
+        request: Optional current request to memoize the lookup on
         
     Returns:
         True if user is a custodian, False otherwise
@@ -97,18 +123,14 @@ def is_custodian(
         >>> is_custodian(user_id, tree_id, db)
         True  # User has custodian role
     """
-    membership = get_membership(user_id, tree_id, db_session)
-    
-    if not membership:
-        return False
-    
-    return membership.role == "custodian"
+    return get_user_role(user_id, tree_id, db_session, request) == "custodian"
 
 
 def is_contributor(
     user_id: UUID,
     tree_id: UUID,
-    db_session: Session
+    db_session: Session,
+    request: Optional[Request] = None
 ) -> bool:
     """Check if a user is at least a contributor of a tree.
     
@@ -116,17 +138,19 @@ def is_contributor(
         user_id: User ID to check
         tree_id: Tree ID to check
         db_session: Database session
+        request: Optional current request to memoize the lookup on
         
     Returns:
         True if user is a contributor or custodian, False otherwise
     """
-    return has_role(user_id, tree_id, "contributor", db_session)
+    return has_role(user_id, tree_id, "contributor", db_session, request)
 
 
 def is_viewer(
     user_id: UUID,
     tree_id: UUID,
-    db_session: Session
+    db_session: Session,
+    request: Optional[Request] = None
 ) -> bool:
     """Check if a user has at least viewer access to a tree.
     
@@ -134,18 +158,20 @@ def is_viewer(
         user_id: User ID to check
         tree_id: Tree ID to check
         db_session: Database session
+        request: Optional current request to memoize the lookup on
         
     Returns:
         True if user has any role in the tree, False otherwise
     """
-    return has_role(user_id, tree_id, "viewer", db_session)
+    return has_role(user_id, tree_id, "viewer", db_session, request)
 
 
 def require_membership(
     user_id: UUID,
     tree_id: UUID,
     db_session: Session,
-    required_role: Optional[RoleType] = None
+    required_role: Optional[RoleType] = None,
+    request: Optional[Request] = None
 ) -> models.Membership:
     """Require a user to have membership in a tree with optional role requirement.
     
@@ -154,6 +180,7 @@ def require_membership(
         tree_id: Tree ID to check
         db_session: Database session
         required_role: Optional minimum role required
+        request: Optional current request to memoize the lookup on
         
     Returns:
         Membership object if access granted
@@ -166,29 +193,29 @@ def require_membership(
         >>> membership = require_membership(user.id, tree_id, db, "custodian")
         # Returns membership or raises 403
     """
-    # Check if tree exists
-    tree = db_session.query(models.Tree).filter(
-        models.Tree.id == tree_id
-    ).first()
-    
-    if not tree:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tree not found"
-        )
-    
-    # Get user membership
-    membership = get_membership(user_id, tree_id, db_session)
+    # A membership implies the tree exists, so the usual case is one query
+    membership = get_membership(user_id, tree_id, db_session, request)
     
     if not membership:
+        # Only now tell a missing tree (404) apart from no access (403)
+        tree_exists = db_session.query(models.Tree.id).filter(
+            models.Tree.id == tree_id
+        ).first() is not None
+        
+        if not tree_exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tree not found"
+            )
+        
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have access to this tree"
         )
     
-    # Check role if required
+    # Check role if required, against the membership already loaded
     if required_role:
-        if not has_role(user_id, tree_id, required_role, db_session):
+        if membership.role_level < ROLE_HIERARCHY.get(required_role, 999):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Requires {required_role} role or higher"
@@ -207,14 +234,36 @@ def count_custodians(tree_id: UUID, db_session: Session) -> int:
     Returns:
         Number of custodians in the tree
     """
-    count = db_session.query(models.Membership).filter(
+    # COUNT the key column directly; Query.count() would wrap a SELECT of
+    # every membership column in a subquery first
+    count = db_session.query(func.count(models.Membership.id)).filter(
         models.Membership.tree_id == tree_id,
         models.Membership.role == "custodian"
-    ).count()
+    ).scalar()
     
     return count
 
 
+def has_multiple_custodians(tree_id: UUID, db_session: Session) -> bool:
+    """Check whether a tree has more than one custodian.
+    
+    Stops after finding two, rather than counting every custodian.
+    
+    Args:
+        tree_id: Tree ID to check
+        db_session: Database session
+        
+    Returns:
+        True if the tree has at least two custodians
+    """
+    custodians = db_session.query(models.Membership.id).filter(
+        models.Membership.tree_id == tree_id,
+        models.Membership.role == "custodian"
+    ).limit(2).all()
+    
+    return len(custodians) > 1
+
+
 def validate_role_change(
     membership: models.Membership,
     new_role: RoleType,
@@ -247,9 +296,7 @@ def validate_role_change(
     
     # If downgrading from custodian, check if they're the last one
     if membership.role == "custodian" and new_role != "custodian":
-        custodian_count = count_custodians(membership.tree_id, db_session)
-        
-        if custodian_count <= 1:
+        if not has_multiple_custodians(membership.tree_id, db_session):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot remove the last custodian from the tree. "
@@ -285,7 +332,8 @@ def get_tree_memberships(
 def get_user_role(
     user_id: UUID,
     tree_id: UUID,
-    db_session: Session
+    db_session: Session,
+    request: Optional[Request] = None
 ) -> Optional[str]:
     """Get a user's role in a tree.
     
@@ -293,13 +341,19 @@ def get_user_role(
         user_id: User ID to check
         tree_id: Tree ID to check
         db_session: Database session
+        request: Optional current request to memoize the lookup on
         
     Returns:
         Role string ('custodian', 'contributor', 'viewer') or None if not a member
     """
-    membership = get_membership(user_id, tree_id, db_session)
-    
-    if not membership:
-        return None
+    if request is not None:
+        # Share the request's memoized membership with the other checks
+        membership = get_membership(user_id, tree_id, db_session, request)
+        return membership.role if membership else None
     
-    return membership.role
+    # Only the role column is needed; the (user_id, tree_id) index covers
+    # the lookup and no Membership object has to be built
+    return db_session.query(models.Membership.role).filter(
+        models.Membership.user_id == user_id,
+        models.Membership.tree_id == tree_id
+    ).scalar()
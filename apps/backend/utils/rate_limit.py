@@ -1,16 +1,73 @@
 """Rate limiting utilities for API endpoints."""
 
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Tuple
-from collections import defaultdict
+from typing import Deque, Dict, Tuple
+from collections import defaultdict, deque
+from uuid import uuid4
+import os
+import time
 import logging
-import pytz
+from utils.env import ensure_loaded
+
+ensure_loaded()
 
 logger = logging.getLogger(__name__)
 
-# In-memory rate limit store (use Redis in production)
-# Structure: {key: [(timestamp1, timestamp2, ...)]}
-_rate_limit_store: Dict[str, list] = defaultdict(list)
+# Shared sliding-window store, so every worker process sees the same counts.
+# Optional: without REDIS_URL (or the redis package) the in-memory store
+# below is used, which is per process.
+REDIS_URL = os.environ.get('REDIS_URL')
+_redis = None
+if REDIS_URL:
+    try:
+        import redis  # type: ignore
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=1)
+    except ImportError:
+        logger.warning('REDIS_URL is set but the redis package is not installed; rate limits are per process')
+
+# In-memory rate limit store (fallback when Redis is not configured)
+# Structure: {key: deque([timestamp1, timestamp2, ...])}, oldest first.
+# Timestamps are time.monotonic() seconds: windows are relative durations,
+# so plain floats are enough and are unaffected by wall-clock changes.
+_rate_limit_store: Dict[str, Deque[float]] = defaultdict(deque)
+
+
+def _check_rate_limit_redis(
+    key: str,
+    max_requests: int,
+    window_minutes: int
+) -> Tuple[bool, int]:
+    """Sliding-window check against a Redis sorted set, in one round trip.
+    
+    The request is added optimistically and taken back out if it went
+    over the limit, so concurrent workers can't both slip in.
+    
+    Args:
+        key: Unique identifier for rate limiting
+        max_requests: Maximum number of requests allowed
+        window_minutes: Time window in minutes
+        
+    Returns:
+        Tuple of (is_allowed, remaining_requests)
+    """
+    # Wall-clock seconds here: the window is shared across processes
+    now = time.time()
+    window_seconds = window_minutes * 60
+    redis_key = f"rate_limit:{key}"
+    member = f"{now}:{uuid4().hex}"
+    
+    pipe = _redis.pipeline()
+    pipe.zremrangebyscore(redis_key, '-inf', now - window_seconds)
+    pipe.zadd(redis_key, {member: now})
+    pipe.zcard(redis_key)
+    pipe.expire(redis_key, window_seconds)
+    _, _, current_count, _ = pipe.execute()
+    
+    if current_count > max_requests:
+        _redis.zrem(redis_key, member)
+        logger.warning(f"Rate limit exceeded for key: {key}")
+        return False, 0
+    
+    return True, max_requests - current_count
 
 
 def check_rate_limit(
@@ -28,23 +85,29 @@ def check_rate_limit(
     Returns:
         Tuple of (is_allowed, remaining_requests)
     """
-    now = datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi'))
-    window_start = now - timedelta(minutes=window_minutes)
+    if _redis is not None:
+        try:
+            return _check_rate_limit_redis(key, max_requests, window_minutes)
+        except Exception as e:
+            # Keep limiting, per process, rather than failing the request
+            logger.error(f"Redis rate limit check failed, using in-memory store: {e}")
+    
+    now = time.monotonic()
+    window_start = now - window_minutes * 60
     
-    # Clean up old entries
-    _rate_limit_store[key] = [
-        timestamp for timestamp in _rate_limit_store[key]
-        if timestamp > window_start
-    ]
+    # Drop expired entries from the old end; nothing is rebuilt
+    timestamps = _rate_limit_store[key]
+    while timestamps and timestamps[0] <= window_start:
+        timestamps.popleft()
     
-    current_count = len(_rate_limit_store[key])
+    current_count = len(timestamps)
     
     if current_count >= max_requests:
         logger.warning(f"Rate limit exceeded for key: {key}")
         return False, 0
     
     # Add current request
-    _rate_limit_store[key].append(now)
+    timestamps.append(now)
     remaining = max_requests - (current_count + 1)
     
     return True, remaining
@@ -56,13 +119,21 @@ def reset_rate_limit(key: str) -> None:
     Args:
         key: Unique identifier to reset
     """
+    if _redis is not None:
+        try:
+            _redis.delete(f"rate_limit:{key}")
+        except Exception as e:
+            logger.error(f"Failed to reset Redis rate limit for key {key}: {e}")
+    
     if key in _rate_limit_store:
         del _rate_limit_store[key]
         logger.info(f"Rate limit reset for key: {key}")
 
 
 def cleanup_expired_entries(window_minutes: int = 15) -> int:
-    """Clean up expired rate limit entries.
+    """Clean up expired entries in the in-memory store.
+    
+    Redis entries expire on their own and need no sweeping.
     
     Args:
         window_minutes: Age threshold for cleanup
@@ -70,20 +141,18 @@ def cleanup_expired_entries(window_minutes: int = 15) -> int:
     Returns:
         Number of entries cleaned up
     """
-    now = datetime.now(timezone.utc).astimezone(pytz.timezone('Africa/Nairobi'))
-    window_start = now - timedelta(minutes=window_minutes)
+    window_start = time.monotonic() - window_minutes * 60
     cleaned_count = 0
     
     keys_to_delete = []
     for key, timestamps in _rate_limit_store.items():
-        # Filter out old timestamps
-        valid_timestamps = [ts for ts in timestamps if ts > window_start]
+        # Drop old timestamps from the front
+        while timestamps and timestamps[0] <= window_start:
+            timestamps.popleft()
         
-        if not valid_timestamps:
+        if not timestamps:
             keys_to_delete.append(key)
             cleaned_count += 1
-        else:
-            _rate_limit_store[key] = valid_timestamps
     
     for key in keys_to_delete:
         del _rate_limit_store[key]
@@ -4,21 +4,193 @@ This module provides validation functions to ensure tree settings changes
 don't violate existing relationships and maintain data integrity.
 """
 
-from typing import Dict, List, Tuple, Optional
-from sqlalchemy.orm import Session
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable, Dict, List, Set, Tuple, Optional
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session, aliased
 from uuid import UUID
 import models
 from schemas import TreeSettings
 import logging
+import operator
 
 logger = logging.getLogger(__name__)
 
 
+# Compares a member's relationship count with a threshold. operator.gt,
+# operator.eq etc. work on ints and on SQL expressions alike
+Comparison = Callable[[object, int], object]
+
+
+@dataclass
+class TreeQueryContext:
+    """A tree to validate, checked with aggregate queries in the database.
+    
+    Nothing is loaded up front: each check runs one GROUP BY ... HAVING
+    query that returns only the offending members, so the cost follows
+    the number of violations rather than the size of the tree. Only the
+    checks a settings change actually tightens are run, and each result is
+    kept, so validation and the impact report don't repeat a query.
+    """
+    db_session: Session
+    tree_id: UUID
+    _results: Dict[object, list] = field(default_factory=dict, init=False, repr=False)
+    
+    @cached_property
+    def member_count(self) -> int:
+        """Number of members in the tree."""
+        return self.db_session.execute(
+            select(func.count(models.Member.id)).where(models.Member.tree_id == self.tree_id)
+        ).scalar_one()
+    
+    @cached_property
+    def relationship_count(self) -> int:
+        """Number of relationships in the tree."""
+        return self.db_session.execute(
+            select(func.count(models.Relationship.id))
+            .where(models.Relationship.tree_id == self.tree_id)
+        ).scalar_one()
+    
+    def _relationship_ends(self, rel_type: str, column):
+        """Select one end's member ID of the tree's relationships of a type."""
+        return select(column.label('member_id')).where(
+            models.Relationship.tree_id == self.tree_id,
+            models.Relationship.type == rel_type
+        )
+    
+    def _counts(self, rel_type: str, compare: Comparison, threshold: int):
+        """Select (member_id, n) for members whose count passes the comparison."""
+        Relationship = models.Relationship
+        if rel_type == 'spouse':
+            ends = union_all(
+                self._relationship_ends(rel_type, Relationship.a_member_id),
+                self._relationship_ends(rel_type, Relationship.b_member_id)
+            ).subquery()
+        else:
+            ends = self._relationship_ends(rel_type, Relationship.b_member_id).subquery()
+        
+        return (
+            select(ends.c.member_id, func.count().label('n'))
+            .group_by(ends.c.member_id)
+            .having(compare(func.count(), threshold))
+        )
+    
+    def _same_sex(self):
+        """Select the names of spouse pairs whose members share a gender."""
+        a, b = aliased(models.Member), aliased(models.Member)
+        return (
+            select(a.name, b.name)
+            .select_from(models.Relationship)
+            .join(a, a.id == models.Relationship.a_member_id)
+            .join(b, b.id == models.Relationship.b_member_id)
+            .where(
+                models.Relationship.tree_id == self.tree_id,
+                models.Relationship.type == 'spouse',
+                a.gender.is_not(None),
+                a.gender != '',
+                func.lower(a.gender) == func.lower(b.gender)
+            )
+        )
+    
+    def has_counted(self, rel_type: str, compare: Comparison, threshold: int) -> bool:
+        """Whether anyone's relationship count passes the comparison.
+        
+        A probe for the common case where a change is safe: the aggregate
+        stops at the first offending member and no names are fetched.
+        """
+        key = (rel_type, compare, threshold)
+        if key in self._results:
+            return bool(self._results[key])
+        
+        found = self.db_session.execute(
+            self._counts(rel_type, compare, threshold).limit(1)
+        ).first() is not None
+        if not found:
+            # Nothing to list either, so counted_names needn't ask again
+            self._results[key] = []
+        return found
+    
+    def has_same_sex_pair(self) -> bool:
+        """Whether any spouse pair shares a gender, stopping at the first."""
+        if 'same_sex' in self._results:
+            return bool(self._results['same_sex'])
+        
+        found = self.db_session.execute(
+            self._same_sex().limit(1)
+        ).first() is not None
+        if not found:
+            self._results['same_sex'] = []
+        return found
+    
+    def counted_names(
+        self,
+        rel_type: str,
+        compare: Comparison,
+        threshold: int
+    ) -> List[Tuple[str, int]]:
+        """Members whose relationship count passes ``compare(count, threshold)``.
+        
+        Args:
+            rel_type: 'spouse' (either end counts) or 'parent-child' (children)
+            compare: Comparison such as operator.gt
+            threshold: Value the count is compared with
+            
+        Returns:
+            (name, count) pairs ordered by name; members outside the tree are skipped
+        """
+        key = (rel_type, compare, threshold)
+        if key in self._results:
+            return self._results[key]
+        
+        counts = self._counts(rel_type, compare, threshold).subquery()
+        rows = self.db_session.execute(
+            select(models.Member.name, counts.c.n)
+            .join(counts, models.Member.id == counts.c.member_id)
+            .where(models.Member.tree_id == self.tree_id)
+            .order_by(models.Member.name)
+        ).all()
+        result = self._results[key] = [(name, count) for name, count in rows]
+        return result
+    
+    def same_sex_pairs(self) -> List[str]:
+        """Spouse pairs whose members share a gender, as "A & B"."""
+        if 'same_sex' in self._results:
+            return self._results['same_sex']
+        
+        rows = self.db_session.execute(self._same_sex()).all()
+        result = self._results['same_sex'] = [f"{a_name} & {b_name}" for a_name, b_name in rows]
+        return result
+
+
+def _is_lower_max(current_max: Optional[int], new_max: Optional[int]) -> bool:
+    """Whether a new maximum is stricter than the current one (None is unlimited)."""
+    return new_max is not None and (current_max is None or new_max < current_max)
+
+
+def _tightened_settings(current: TreeSettings, new: TreeSettings) -> Set[str]:
+    """Name the checks a settings change can fail, i.e. the rules it makes stricter.
+    
+    Loosening a setting (raising a maximum, allowing something again)
+    can't invalidate existing relationships, so those checks never run.
+    """
+    tightened = {
+        'monogamy': new.monogamy and not current.monogamy,
+        'max_spouses': _is_lower_max(current.max_spouses_per_member, new.max_spouses_per_member),
+        'same_sex': current.allow_same_sex and not new.allow_same_sex,
+        'single_parent': current.allow_single_parent and not new.allow_single_parent,
+        'multi_parent': current.allow_multi_parent_children and not new.allow_multi_parent_children,
+        'max_parents': _is_lower_max(current.max_parents_per_child, new.max_parents_per_child),
+    }
+    return {check for check, applies in tightened.items() if applies}
+
+
 def validate_settings_change(
     db_session: Session,
     tree_id: UUID,
     current_settings: TreeSettings,
-    new_settings: TreeSettings
+    new_settings: TreeSettings,
+    context: Optional[TreeQueryContext] = None
 ) -> Tuple[bool, Optional[List[str]]]:
     """Validate that new settings don't violate existing relationships.
     
@@ -34,6 +206,7 @@ def validate_settings_change(
         tree_id: UUID of the tree being updated
         current_settings: Current tree settings
         new_settings: Proposed new settings
+        context: Tree to check; a TreeQueryContext is made here when not given
         
     Returns:
         Tuple of (is_valid, error_messages)
@@ -42,24 +215,23 @@ def validate_settings_change(
     """
     errors = []
     
-    # Get all members in the tree
-    members = db_session.query(models.Member).filter(
-        models.Member.tree_id == tree_id
-    ).all()
+    # Only stricter rules need checking; a change that only loosens
+    # settings is accepted without touching the tree
+    tightened = _tightened_settings(current_settings, new_settings)
+    if not tightened:
+        return True, None
+    
+    if context is None:
+        context = TreeQueryContext(db_session, tree_id)
     
-    if not members:
+    if not context.member_count:
         # Empty tree, all changes are safe
         return True, None
     
-    # Get all relationships in the tree
-    relationships = db_session.query(models.Relationship).filter(
-        models.Relationship.tree_id == tree_id
-    ).all()
-    
     # 1. Check polygamy constraints
-    if new_settings.monogamy and not current_settings.monogamy:
+    if 'monogamy' in tightened and _has_monogamy_violation(context):
         # Trying to enable monogamy (disable polygamy)
-        violations = _check_monogamy_violations(members, relationships)
+        violations = _check_monogamy_violations(context)
         if violations:
             errors.append(
                 f"Cannot enable monogamy: {len(violations)} member(s) have multiple spouses. "
@@ -68,24 +240,22 @@ def validate_settings_change(
             )
     
     # 2. Check max spouses constraint
-    if new_settings.max_spouses_per_member is not None:
-        current_max = current_settings.max_spouses_per_member
-        if current_max is None or new_settings.max_spouses_per_member < current_max:
-            violations = _check_max_spouses_violations(
-                members, relationships, new_settings.max_spouses_per_member
+    if 'max_spouses' in tightened and _has_max_spouses_violation(context, new_settings.max_spouses_per_member):
+        violations = _check_max_spouses_violations(
+            context, new_settings.max_spouses_per_member
+        )
+        if violations:
+            max_found = max(count for _, count in violations)
+            errors.append(
+                f"Cannot reduce max_spouses_per_member to {new_settings.max_spouses_per_member}: "
+                f"{len(violations)} member(s) currently have more spouses (up to {max_found}). "
+                f"Members affected: {', '.join(name for name, _ in violations[:5])}"
+                + (f" and {len(violations) - 5} more" if len(violations) > 5 else "")
             )
-            if violations:
-                max_found = max(count for _, count in violations)
-                errors.append(
-                    f"Cannot reduce max_spouses_per_member to {new_settings.max_spouses_per_member}: "
-                    f"{len(violations)} member(s) currently have more spouses (up to {max_found}). "
-                    f"Members affected: {', '.join(name for name, _ in violations[:5])}"
-                    + (f" and {len(violations) - 5} more" if len(violations) > 5 else "")
-                )
     
     # 3. Check same-sex unions
-    if not new_settings.allow_same_sex and current_settings.allow_same_sex:
-        violations = _check_same_sex_violations(members, relationships)
+    if 'same_sex' in tightened and _has_same_sex_violation(context):
+        violations = _check_same_sex_violations(context)
         if violations:
             errors.append(
                 f"Cannot disable same-sex unions: {len(violations)} same-sex spouse relationship(s) exist. "
@@ -94,8 +264,8 @@ def validate_settings_change(
             )
     
     # 4. Check single parent constraint
-    if not new_settings.allow_single_parent and current_settings.allow_single_parent:
-        violations = _check_single_parent_violations(members, relationships)
+    if 'single_parent' in tightened and _has_single_parent_violation(context):
+        violations = _check_single_parent_violations(context)
         if violations:
             errors.append(
                 f"Cannot disable single parents: {len(violations)} child(ren) have only one parent. "
@@ -104,8 +274,8 @@ def validate_settings_change(
             )
     
     # 5. Check multi-parent children constraint
-    if not new_settings.allow_multi_parent_children and current_settings.allow_multi_parent_children:
-        violations = _check_multi_parent_violations(members, relationships)
+    if 'multi_parent' in tightened and _has_multi_parent_violation(context):
+        violations = _check_multi_parent_violations(context)
         if violations:
             errors.append(
                 f"Cannot disable multi-parent children: {len(violations)} child(ren) have more than 2 parents. "
@@ -114,20 +284,18 @@ def validate_settings_change(
             )
     
     # 6. Check max parents per child constraint
-    if new_settings.max_parents_per_child is not None:
-        current_max = current_settings.max_parents_per_child
-        if current_max is None or new_settings.max_parents_per_child < current_max:
-            violations = _check_max_parents_violations(
-                members, relationships, new_settings.max_parents_per_child
+    if 'max_parents' in tightened and _has_max_parents_violation(context, new_settings.max_parents_per_child):
+        violations = _check_max_parents_violations(
+            context, new_settings.max_parents_per_child
+        )
+        if violations:
+            max_found = max(count for _, count in violations)
+            errors.append(
+                f"Cannot reduce max_parents_per_child to {new_settings.max_parents_per_child}: "
+                f"{len(violations)} child(ren) currently have more parents (up to {max_found}). "
+                f"Children affected: {', '.join(name for name, _ in violations[:5])}"
+                + (f" and {len(violations) - 5} more" if len(violations) > 5 else "")
             )
-            if violations:
-                max_found = max(count for _, count in violations)
-                errors.append(
-                    f"Cannot reduce max_parents_per_child to {new_settings.max_parents_per_child}: "
-                    f"{len(violations)} child(ren) currently have more parents (up to {max_found}). "
-                    f"Children affected: {', '.join(name for name, _ in violations[:5])}"
-                    + (f" and {len(violations) - 5} more" if len(violations) > 5 else "")
-                )
     
     if errors:
         logger.warning(f"Settings validation failed for tree {tree_id}: {errors}")
@@ -138,157 +306,106 @@ def validate_settings_change(
 
 
 def _check_monogamy_violations(
-    members: List[models.Member],
-    relationships: List[models.Relationship]
+    context: TreeQueryContext
 ) -> List[str]:
     """Check for members with multiple spouses."""
-    spouse_counts = {}
-    
-    for rel in relationships:
-        if rel.type == 'spouse':
-            spouse_counts[rel.a_member_id] = spouse_counts.get(rel.a_member_id, 0) + 1
-            spouse_counts[rel.b_member_id] = spouse_counts.get(rel.b_member_id, 0) + 1
-    
-    # Find members with more than 1 spouse
-    violations = []
-    member_map = {m.id: m for m in members}
-    
-    for member_id, count in spouse_counts.items():
-        if count > 1:
-            member = member_map.get(member_id)
-            if member:
-                violations.append(member.name)
-    
-    return violations
+    return [name for name, _ in context.counted_names('spouse', operator.gt, 1)]
 
 
 def _check_max_spouses_violations(
-    members: List[models.Member],
-    relationships: List[models.Relationship],
+    context: TreeQueryContext,
     max_spouses: int
 ) -> List[Tuple[str, int]]:
     """Check for members exceeding max spouse limit."""
-    spouse_counts = {}
-    
-    for rel in relationships:
-        if rel.type == 'spouse':
-            spouse_counts[rel.a_member_id] = spouse_counts.get(rel.a_member_id, 0) + 1
-            spouse_counts[rel.b_member_id] = spouse_counts.get(rel.b_member_id, 0) + 1
-    
-    violations = []
-    member_map = {m.id: m for m in members}
-    
-    for member_id, count in spouse_counts.items():
-        if count > max_spouses:
-            member = member_map.get(member_id)
-            if member:
-                violations.append((member.name, count))
-    
-    return violations
+    return context.counted_names('spouse', operator.gt, max_spouses)
 
 
 def _check_same_sex_violations(
-    members: List[models.Member],
-    relationships: List[models.Relationship]
+    context: TreeQueryContext
 ) -> List[str]:
     """Check for same-sex spouse relationships."""
-    violations = []
-    member_map = {m.id: m for m in members}
-    
-    for rel in relationships:
-        if rel.type == 'spouse':
-            member_a = member_map.get(rel.a_member_id)
-            member_b = member_map.get(rel.b_member_id)
-            
-            if member_a and member_b:
-                # Check if both have gender specified and are the same
-                if (member_a.gender and member_b.gender and 
-                    member_a.gender.lower() == member_b.gender.lower()):
-                    violations.append(f"{member_a.name} & {member_b.name}")
-    
-    return violations
+    return context.same_sex_pairs()
 
 
 def _check_single_parent_violations(
-    members: List[models.Member],
-    relationships: List[models.Relationship]
+    context: TreeQueryContext
 ) -> List[str]:
     """Check for children with only one parent."""
-    # Count parents for each child
-    parent_counts = {}
-    
-    for rel in relationships:
-        if rel.type == 'parent-child':
-            # b_member is the child in parent-child relationships
-            child_id = rel.b_member_id
-            parent_counts[child_id] = parent_counts.get(child_id, 0) + 1
-    
-    violations = []
-    member_map = {m.id: m for m in members}
-    
-    for child_id, count in parent_counts.items():
-        if count == 1:
-            child = member_map.get(child_id)
-            if child:
-                violations.append(child.name)
-    
-    return violations
+    return [name for name, _ in context.counted_names('parent-child', operator.eq, 1)]
 
 
 def _check_multi_parent_violations(
-    members: List[models.Member],
-    relationships: List[models.Relationship]
+    context: TreeQueryContext
 ) -> List[str]:
     """Check for children with more than 2 parents."""
-    parent_counts = {}
-    
-    for rel in relationships:
-        if rel.type == 'parent-child':
-            child_id = rel.b_member_id
-            parent_counts[child_id] = parent_counts.get(child_id, 0) + 1
-    
-    violations = []
-    member_map = {m.id: m for m in members}
-    
-    for child_id, count in parent_counts.items():
-        if count > 2:
-            child = member_map.get(child_id)
-            if child:
-                violations.append(child.name)
-    
-    return violations
+    return [name for name, _ in context.counted_names('parent-child', operator.gt, 2)]
 
 
 def _check_max_parents_violations(
-    members: List[models.Member],
-    relationships: List[models.Relationship],
+    context: TreeQueryContext,
     max_parents: int
 ) -> List[Tuple[str, int]]:
     """Check for children exceeding max parent limit."""
-    parent_counts = {}
-    
-    for rel in relationships:
-        if rel.type == 'parent-child':
-            child_id = rel.b_member_id
-            parent_counts[child_id] = parent_counts.get(child_id, 0) + 1
-    
-    violations = []
-    member_map = {m.id: m for m in members}
-    
-    for child_id, count in parent_counts.items():
-        if count > max_parents:
-            child = member_map.get(child_id)
-            if child:
-                violations.append((child.name, count))
-    
-    return violations
+    return context.counted_names('parent-child', operator.gt, max_parents)
+
+
+# Existence probes, one per check above: validation only needs the full
+# list (for its error message) when a probe finds something
+def _has_monogamy_violation(context: TreeQueryContext) -> bool:
+    """Whether any member has multiple spouses."""
+    return context.has_counted('spouse', operator.gt, 1)
+
+
+def _has_max_spouses_violation(context: TreeQueryContext, max_spouses: int) -> bool:
+    """Whether any member exceeds the max spouse limit."""
+    return context.has_counted('spouse', operator.gt, max_spouses)
+
+
+def _has_same_sex_violation(context: TreeQueryContext) -> bool:
+    """Whether any same-sex spouse relationship exists."""
+    return context.has_same_sex_pair()
+
+
+def _has_single_parent_violation(context: TreeQueryContext) -> bool:
+    """Whether any child has only one parent."""
+    return context.has_counted('parent-child', operator.eq, 1)
+
+
+def _has_multi_parent_violation(context: TreeQueryContext) -> bool:
+    """Whether any child has more than 2 parents."""
+    return context.has_counted('parent-child', operator.gt, 2)
+
+
+def _has_max_parents_violation(context: TreeQueryContext, max_parents: int) -> bool:
+    """Whether any child exceeds the max parent limit."""
+    return context.has_counted('parent-child', operator.gt, max_parents)
+
+
+# The settings get_settings_change_impact reports on, in report order: the
+# _tightened_settings check each can fail, the key its offenders are listed
+# under, and how to find them
+_IMPACT_CHECKS = (
+    ('monogamy', 'monogamy', 'members',
+     lambda context, new: _check_monogamy_violations(context)),
+    ('allow_same_sex', 'same_sex', 'relationships',
+     lambda context, new: _check_same_sex_violations(context)),
+    ('allow_single_parent', 'single_parent', 'children',
+     lambda context, new: _check_single_parent_violations(context)),
+    ('allow_multi_parent_children', 'multi_parent', 'children',
+     lambda context, new: _check_multi_parent_violations(context)),
+    ('max_spouses_per_member', 'max_spouses', 'members',
+     lambda context, new: _check_max_spouses_violations(context, new.max_spouses_per_member)),
+    ('max_parents_per_child', 'max_parents', 'children',
+     lambda context, new: _check_max_parents_violations(context, new.max_parents_per_child)),
+)
 
 
 def get_settings_change_impact(
     db_session: Session,
     tree_id: UUID,
     current_settings: TreeSettings,
-    new_settings: TreeSettings
+    new_settings: TreeSettings,
+    context: Optional[TreeQueryContext] = None
 ) -> Dict[str, any]:
     """Get a detailed report of how settings changes would impact the tree.
     
@@ -300,130 +417,86 @@ def get_settings_change_impact(
         tree_id: UUID of the tree
         current_settings: Current settings
         new_settings: Proposed new settings
+        context: Tree to check; a TreeQueryContext is made here when not given
         
     Returns:
         Dictionary with impact analysis
     """
-    # Get all members and relationships
-    members = db_session.query(models.Member).filter(
-        models.Member.tree_id == tree_id
-    ).all()
+    if context is None:
+        context = TreeQueryContext(db_session, tree_id)
     
-    relationships = db_session.query(models.Relationship).filter(
-        models.Relationship.tree_id == tree_id
-    ).all()
+    # Violations are only looked for where the change makes a rule stricter
+    tightened = _tightened_settings(current_settings, new_settings)
     
     impact = {
-        "total_members": len(members),
-        "total_relationships": len(relationships),
+        "total_members": context.member_count,
+        "total_relationships": context.relationship_count,
         "changes": [],
         "warnings": [],
         "safe": True
     }
     
     # Analyze each setting change
-    if new_settings.monogamy != current_settings.monogamy:
-        impact["changes"].append({
-            "setting": "monogamy",
-            "old_value": current_settings.monogamy,
-            "new_value": new_settings.monogamy
-        })
-        if new_settings.monogamy:
-            violations = _check_monogamy_violations(members, relationships)
-            if violations:
-                impact["safe"] = False
-                impact["warnings"].append({
-                    "type": "monogamy_violation",
-                    "count": len(violations),
-                    "members": violations[:10]
-                })
-    
-    if new_settings.allow_same_sex != current_settings.allow_same_sex:
-        impact["changes"].append({
-            "setting": "allow_same_sex",
-            "old_value": current_settings.allow_same_sex,
-            "new_value": new_settings.allow_same_sex
-        })
-        if not new_settings.allow_same_sex:
-            violations = _check_same_sex_violations(members, relationships)
-            if violations:
-                impact["safe"] = False
-                impact["warnings"].append({
-                    "type": "same_sex_violation",
-                    "count": len(violations),
-                    "relationships": violations[:10]
-                })
-    
-    if new_settings.allow_single_parent != current_settings.allow_single_parent:
-        impact["changes"].append({
-            "setting": "allow_single_parent",
-            "old_value": current_settings.allow_single_parent,
-            "new_value": new_settings.allow_single_parent
-        })
-        if not new_settings.allow_single_parent:
-            violations = _check_single_parent_violations(members, relationships)
-            if violations:
-                impact["safe"] = False
-                impact["warnings"].append({
-                    "type": "single_parent_violation",
-                    "count": len(violations),
-                    "children": violations[:10]
-                })
-    
-    if new_settings.allow_multi_parent_children != current_settings.allow_multi_parent_children:
+    current_values = current_settings.model_dump()
+    new_values = new_settings.model_dump()
+    for setting, check, listed_as, find_violations in _IMPACT_CHECKS:
+        if new_values[setting] == current_values[setting]:
+            continue
+        
         impact["changes"].append({
-            "setting": "allow_multi_parent_children",
-            "old_value": current_settings.allow_multi_parent_children,
-            "new_value": new_settings.allow_multi_parent_children
+            "setting": setting,
+            "old_value": current_values[setting],
+            "new_value": new_values[setting]
         })
-        if not new_settings.allow_multi_parent_children:
-            violations = _check_multi_parent_violations(members, relationships)
+        if check in tightened:
+            violations = find_violations(context, new_settings)
             if violations:
                 impact["safe"] = False
                 impact["warnings"].append({
-                    "type": "multi_parent_violation",
+                    "type": f"{check}_violation",
                     "count": len(violations),
-                    "children": violations[:10]
+                    listed_as: violations[:10]
                 })
     
-    if new_settings.max_spouses_per_member != current_settings.max_spouses_per_member:
-        impact["changes"].append({
-            "setting": "max_spouses_per_member",
-            "old_value": current_settings.max_spouses_per_member,
-            "new_value": new_settings.max_spouses_per_member
-        })
-        if (new_settings.max_spouses_per_member is not None and 
-            (current_settings.max_spouses_per_member is None or 
-             new_settings.max_spouses_per_member < current_settings.max_spouses_per_member)):
-            violations = _check_max_spouses_violations(
-                members, relationships, new_settings.max_spouses_per_member
-            )
-            if violations:
-                impact["safe"] = False
-                impact["warnings"].append({
-                    "type": "max_spouses_violation",
-                    "count": len(violations),
-                    "members": [(name, count) for name, count in violations[:10]]
-                })
+    return impact
+
+
+def analyze_settings_change(
+    db_session: Session,
+    tree_id: UUID,
+    current_settings: TreeSettings,
+    new_settings: TreeSettings,
+    context: Optional[TreeQueryContext] = None,
+    impact_if_valid: bool = True
+) -> Tuple[bool, Optional[List[str]], Optional[Dict[str, any]]]:
+    """Validate a settings change and report its impact over one shared context.
     
-    if new_settings.max_parents_per_child != current_settings.max_parents_per_child:
-        impact["changes"].append({
-            "setting": "max_parents_per_child",
-            "old_value": current_settings.max_parents_per_child,
-            "new_value": new_settings.max_parents_per_child
-        })
-        if (new_settings.max_parents_per_child is not None and 
-            (current_settings.max_parents_per_child is None or 
-             new_settings.max_parents_per_child < current_settings.max_parents_per_child)):
-            violations = _check_max_parents_violations(
-                members, relationships, new_settings.max_parents_per_child
-            )
-            if violations:
-                impact["safe"] = False
-                impact["warnings"].append({
-                    "type": "max_parents_violation",
-                    "count": len(violations),
-                    "children": [(name, count) for name, count in violations[:10]]
-                })
+    Each check's result is kept on the context, so the impact analysis
+    reuses what validation already found instead of asking again.
     
-    return impact
+    Args:
+        db_session: Database session
+        tree_id: UUID of the tree
+        current_settings: Current settings
+        new_settings: Proposed new settings
+        context: Tree to check; a TreeQueryContext is made here when not given
+        impact_if_valid: Also build the impact report when the change is valid
+        
+    Returns:
+        Tuple of (is_valid, error_messages, impact)
+        - impact: As from get_settings_change_impact, or None when the
+          change is valid and impact_if_valid is False
+    """
+    if context is None:
+        context = TreeQueryContext(db_session, tree_id)
+    
+    is_valid, errors = validate_settings_change(
+        db_session, tree_id, current_settings, new_settings, context
+    )
+    if is_valid and not impact_if_valid:
+        return is_valid, errors, None
+    
+    impact = get_settings_change_impact(
+        db_session, tree_id, current_settings, new_settings, context
+    )
+    return is_valid, errors, impact
@@ -1,10 +1,56 @@
 """Validation utilities for data integrity checks."""
 
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import exists, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import Optional
+from typing import Iterable, List, Optional
 from uuid import UUID
+from datetime import datetime
+import logging
 import models
+import schemas
+
+logger = logging.getLogger(__name__)
+
+
+def validate_member_against_settings(
+    member_data: schemas.MemberCreate,
+    tree: models.Tree,
+    db_session: Session
+) -> None:
+    """Validate member data against tree settings.
+    
+    Args:
+        member_data: Member creation data
+        tree: Tree to validate against
+        db_session: Database session
+        
+    Raises:
+        HTTPException 400: If validation fails
+    """
+    # Parse tree settings
+    settings = schemas.TreeSettings(**tree.settings_json) if tree.settings_json else schemas.TreeSettings()
+    
+    # Validate gender if provided (optional validation)
+    if member_data.gender:
+        allowed_genders = ["male", "female", "other", "prefer not to say"]
+        if member_data.gender.lower() not in allowed_genders:
+            logger.warning(f"Non-standard gender value provided: {member_data.gender}")
+            # We allow it but log it for monitoring
+    
+    # Validate DOB format if provided
+    if member_data.dob:
+        try:
+            # Try to parse as ISO 8601 date
+            datetime.fromisoformat(member_data.dob.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Date of birth must be in ISO 8601 format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"
+            )
 
 
 def validate_unique_member_email(
@@ -25,24 +71,90 @@ def validate_unique_member_email(
     if not email or email.strip() == '':
         return  # Allow empty/null emails
     
-    query = db_session.query(models.Member).filter(
-        models.Member.email == email.strip(),
-        models.Member.email.isnot(None),
-        models.Member.email != ''
-    )
+    # A non-empty email matches only rows covered by the partial unique
+    # index ix_members_email_unique, so EXISTS is a single index probe
+    condition = exists().where(models.Member.email == email.strip())
     
     if exclude_member_id:
-        query = query.filter(models.Member.id != exclude_member_id)
+        condition = condition.where(models.Member.id != exclude_member_id)
     
-    existing_member = query.first()
-    
-    if existing_member:
+    if db_session.scalar(select(condition)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"A member with email '{email}' already exists. Each member must have a unique email address."
         )
 
 
+@contextmanager
+def translate_member_email_conflict(db_session: Session):
+    """Turn a violation of the members email index into the validators' HTTP 400.
+    
+    The validators above give the friendly error up front; the partial
+    unique index ix_members_email_unique still catches a member written
+    by a concurrent request between the check and the flush/commit this
+    wraps. Other integrity errors are re-raised unchanged.
+    
+    Args:
+        db_session: Database session, rolled back on a conflict
+        
+    Raises:
+        HTTPException 400: If the write duplicated a member email
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        if 'ix_members_email_unique' not in str(exc.orig):
+            raise
+        db_session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A member with this email already exists. Each member must have a unique email address."
+        ) from exc
+
+
+def validate_unique_member_emails_bulk(
+    db_session: Session,
+    emails: List[str],
+    exclude_member_ids: Optional[Iterable[UUID]] = None
+) -> None:
+    """Validate a batch of member emails with one query instead of one per email.
+    
+    Emails must be unique within the batch and against existing members.
+    Empty/null emails are skipped, as in validate_unique_member_email.
+    
+    Args:
+        db_session: Database session
+        emails: Emails to validate
+        exclude_member_ids: Optional member IDs to exclude from check (for updates)
+        
+    Raises:
+        HTTPException 400: If any email repeats in the batch or already exists,
+            naming every offending email
+    """
+    counts = Counter(email.strip() for email in emails if email and email.strip())
+    
+    repeated = sorted(email for email, count in counts.items() if count > 1)
+    if repeated:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Emails used by more than one member in this request: {', '.join(repeated)}"
+        )
+    
+    if not counts:
+        return
+    
+    stmt = select(models.Member.email).where(models.Member.email.in_(list(counts)))
+    if exclude_member_ids:
+        stmt = stmt.where(models.Member.id.not_in(list(exclude_member_ids)))
+    
+    existing = sorted(set(db_session.scalars(stmt)))
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Members with these emails already exist: {', '.join(existing)}. Each member must have a unique email address."
+        )
+
+
 def validate_unique_user_email(
     db_session: Session,
     email: str,
@@ -64,16 +176,12 @@ def validate_unique_user_email(
             detail="Email is required for users"
         )
     
-    query = db_session.query(models.User).filter(
-        models.User.email == email.strip()
-    )
+    condition = exists().where(models.User.email == email.strip())
     
     if exclude_user_id:
-        query = query.filter(models.User.id != exclude_user_id)
-    
-    existing_user = query.first()
+        condition = condition.where(models.User.id != exclude_user_id)
     
-    if existing_user:
+    if db_session.scalar(select(condition)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"A user with email '{email}' already exists."